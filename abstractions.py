@@ -3,6 +3,8 @@ from abc import ABCMeta, abstractmethod
 import pygame
 from pygame.sprite import Sprite
 
+from constants import CollisionLayer
+
 
 class IEventHandler(metaclass=ABCMeta):
 
@@ -57,17 +59,28 @@ class DamageableTrait(metaclass=ABCMeta):
     def is_dead(self):
         return self.hp == 0
 
+    def digest_state(self):
+        return super().digest_state() + (self._hp,)
+
 
 class AbstractGameEntity(Sprite, metaclass=ABCMeta):
+    COLLISION_LAYER = CollisionLayer.NONE           # what this entity is
+    COLLISION_MASK = CollisionLayer.NONE            # what this entity reacts to when it collides
 
     def __init__(self, event_queue):
         super().__init__()
+        self._removal_event = None
+        self._reinitialize(event_queue)
+
+    def _reinitialize(self, event_queue):           # also used by pooled entities when they are handed out again
         self._event_queue = event_queue
         self._to_be_removed = False
         self._is_moving_simultaneously = False
+        self._listener = None
 
     def move_to(self, coords):
         self.rect.topleft = coords
+        self._notify_moved()
 
     def move_by_direction(self, direction, speed):
         delta = self._compute_movement_delta(direction, speed)
@@ -75,6 +88,15 @@ class AbstractGameEntity(Sprite, metaclass=ABCMeta):
 
     def move_by_delta(self, delta):
         self.rect.move_ip(delta)
+        self._notify_moved()
+
+    def _notify_moved(self):
+        if self._listener is not None:
+            self._listener.on_entity_moved(self)
+
+    def _notify_repainted(self):
+        if self._listener is not None:
+            self._listener.on_entity_repainted(self)
 
     def _compute_movement_delta(self, direction, speed):
         return tuple(map(lambda v: v * speed, direction.value))
@@ -95,17 +117,47 @@ class AbstractGameEntity(Sprite, metaclass=ABCMeta):
     def rect(self) -> pygame.Rect:
         pass
 
+    @property
+    def is_marked_for_removal(self):
+        return self._to_be_removed
+
+    def mark_for_removal(self):
+        self._to_be_removed = True
+
     @property
     def is_moving_simultaneously(self):
         return self._is_moving_simultaneously
 
     @is_moving_simultaneously.setter
     def is_moving_simultaneously(self, value):
+        if value == self._is_moving_simultaneously:
+            return
+
         self._is_moving_simultaneously = value
+        if self._listener is not None:
+            self._listener.on_entity_moving_changed(self)
+
+    @property
+    def listener(self):
+        return self._listener
+
+    @listener.setter
+    def listener(self, value):
+        self._listener = value
+
+    @property
+    def removal_event(self):                        # events are immutable, so the entity's RemoveEntityEvent is created once and reused, also across pool reuse
+        if self._removal_event is None:
+            from events import RemoveEntityEvent    # imported here: events imports AbstractGameEntity from this module
+            self._removal_event = RemoveEntityEvent(entity=self)
+        return self._removal_event
 
     def on_display_refresh(self, display):
         display.blit(self.surf, self.rect)
 
+    def digest_state(self):                         # what GameEntityManager.state_digest fingerprints; subclasses add any other state that steers the match
+        return (type(self).__name__, tuple(self.rect), self._is_moving_simultaneously)
+
     def queue_event_at_head(self, event):
         return self._event_queue.queue_event_at_head(event)
 
@@ -116,8 +168,7 @@ class AbstractGameEntity(Sprite, metaclass=ABCMeta):
         return self._event_queue.queue_event_on_next_tick(event)
 
     def delete(self):
-        from events import RemoveEntityEvent
-        return self._event_queue.queue_event_on_next_tick(RemoveEntityEvent(entity=self))
+        return self._event_queue.queue_event_on_next_tick(self.removal_event)
 
     def is_partially_outside_screen(self, width, height):
         return self.rect.left < 0 \
@@ -0,0 +1,336 @@
+import os
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")                   # benchmarks draw to an off-screen display unless a real driver is asked for
+
+import argparse
+import json
+import platform
+import statistics
+import sys
+import time
+import tracemalloc
+
+import pygame
+
+from constants import Control, Direction
+from ecs import World
+from entities import GameEntityManager, Tank, Wall, Tree, AlwaysMovingTank
+from events import EventQueue, KeyPressedEvent, MoveControlEvent, MoveStopControlEvent, RemoveEntityEvent, SimultaneousMoveEvent
+from game import GameInitializer
+from handlers import EngineEventMapper, MovementEventHandler
+from profiling import EventProfiler
+from utils import RANDOM_STREAMS, collision, get_random_coords
+
+WIDTH = 1000
+HEIGHT = 800
+DEFAULT_COUNTS = [100, 400, 1600]
+DEFAULT_REPEAT = 20
+DEFAULT_THRESHOLD = 0.25                                            # a benchmark regresses when it is this much slower than its baseline
+DEFAULT_MEMORY_TICKS = 600
+
+
+class BenchmarkScene:                                               # a seeded arena with roughly `count` walls, trees and tanks
+
+    def __init__(self, count, seed=0):
+        RANDOM_STREAMS.reseed(seed)
+        rng = RANDOM_STREAMS.terrain
+
+        self.display = pygame.display.set_mode((WIDTH, HEIGHT))
+        self.event_queue = EventQueue()
+        self.entity_manager = GameEntityManager(self.display)
+
+        num_tanks = max(2, count // 10)
+        num_trees = count // 5
+        num_walls = count - num_tanks - num_trees
+
+        self.tanks = []
+        for player_id in range(1, num_tanks + 1):                   # tanks never spawn on top of each other or of walls, same as in a real match
+            while True:
+                tank = AlwaysMovingTank(self.event_queue, player_id, self._coords(rng, Tank), "gray")
+                if not pygame.sprite.spritecollideany(tank, self.tanks):
+                    self.tanks.append(tank)
+                    break
+
+        self.walls = [Wall(self.event_queue, self._coords(rng, Wall)) for _ in range(num_walls)]
+        self.walls = [wall for wall in self.walls if not pygame.sprite.spritecollideany(wall, self.tanks)]
+        self.trees = [Tree(self.event_queue, self._coords(rng, Tree)) for _ in range(num_trees)]
+
+        self.entity_manager.register_entities(self.walls)
+        self.entity_manager.register_entities(self.tanks)
+        self.entity_manager.register_entities(self.trees)
+
+        for handler in GameInitializer()._get_default_handlers(self.event_queue, self.entity_manager, WIDTH, HEIGHT):
+            self.event_queue.register_handler(handler)
+
+    @staticmethod
+    def _coords(rng, entity_type):
+        x, y = get_random_coords(WIDTH // entity_type.WIDTH, HEIGHT // entity_type.HEIGHT, rng=rng)
+        return x * entity_type.WIDTH, y * entity_type.HEIGHT
+
+
+def bench_get_collided_with(scene):
+    entity_manager = scene.entity_manager
+    tanks = scene.tanks
+
+    def run():
+        for tank in tanks:
+            entity_manager.get_collided_with(tank)
+
+    return None, run
+
+
+def bench_collision(scene):
+    rects = [entity.rect for entity in scene.walls + scene.trees + scene.tanks]
+    center = (WIDTH // 2, HEIGHT // 2)
+
+    def run():
+        for rect in rects:
+            collision(rect, center, 100)
+
+    return None, run
+
+
+def bench_broadcast_queued(scene):
+    event_queue = scene.event_queue
+    tanks = scene.tanks
+    directions = list(Direction)
+    count = len(scene.entity_manager.get_entities())
+
+    def setup():
+        for index in range(count):
+            tank = tanks[index % len(tanks)]
+            if index % 2:
+                event_queue.queue_event_at_tail(MoveStopControlEvent(entity=tank))
+            else:
+                event_queue.queue_event_at_tail(MoveControlEvent(entity=tank, direction=directions[index % len(directions)]))
+
+    return setup, event_queue.broadcast_queued
+
+
+def bench_simultaneous_move(scene):
+    handler = MovementEventHandler(scene.event_queue, scene.entity_manager, WIDTH, HEIGHT)
+    tanks = scene.tanks
+    event = None
+
+    def setup():                                                    # the handler drops undone tanks from the event, so each run gets a fresh one
+        nonlocal event
+        event = SimultaneousMoveEvent(entities=list(tanks))
+
+    def run():
+        handler.handle_event(event)
+
+    return setup, run
+
+
+def bench_tank_rerender(scene):
+    tanks = scene.tanks
+
+    def run():
+        for tank in tanks:
+            tank.rerender()
+
+    return None, run
+
+
+def bench_refresh_display(scene):
+    return None, scene.entity_manager.refresh_display
+
+
+def bench_ecs_tick(scene):                                          # the same walls and always-moving tanks, all firing, as one World tick
+    world = None
+
+    def setup():
+        nonlocal world
+        world, tanks = World.from_entities(scene.walls + scene.tanks, WIDTH, HEIGHT)
+        for entity_id in tanks.values():
+            world.bind_controls(entity_id).press(Control.FIRE_BULLET)
+
+    def run():
+        world.tick()
+
+    return setup, run
+
+
+BENCHMARKS = {
+    "get_collided_with": bench_get_collided_with,
+    "collision": bench_collision,
+    "broadcast_queued": bench_broadcast_queued,
+    "simultaneous_move": bench_simultaneous_move,
+    "tank_rerender": bench_tank_rerender,
+    "refresh_display": bench_refresh_display,
+    "ecs_tick": bench_ecs_tick,
+}
+
+
+class ScriptedInput(EngineEventMapper):                             # both players hold a changing set of keys, so tanks move, fire and drop bombs all match long
+    KEYS = [pygame.key.key_code(name) for name in ["space", ".", "c", ",", "w", "a", "s", "d", "up", "down", "left", "right"]]
+
+    def __init__(self):
+        super().__init__(self.KEYS)
+        self._tick = 0
+
+    def poll_events(self):
+        tick = self._tick
+        self._tick += 1
+
+        return self.key_transitions({key for index, key in enumerate(self.KEYS) if (tick // (7 + index)) % 2 == 0})
+
+
+def instance_size(obj):
+    return sys.getsizeof(obj) + (sys.getsizeof(obj.__dict__) if hasattr(obj, "__dict__") else 0)
+
+
+class EventAllocationCounter(EventProfiler):                        # counts broadcast events that are new objects rather than shared, reused ones
+
+    def __init__(self):
+        super().__init__()
+        self._seen = {}                                             # holding on to every event keeps its id from being reused by a later one
+        self.new_events = 0
+        self.new_event_bytes = 0
+
+    def on_event(self, event):
+        super().on_event(event)
+        if id(event) not in self._seen:
+            self._seen[id(event)] = event
+            self.new_events += 1
+            self.new_event_bytes += instance_size(event)
+
+
+def measure_tick_allocations(ticks, seed=0):                        # transient heap high-water and retained growth per tick of a scripted headless match
+    game = GameInitializer().initialize_game(headless=True, seed=seed, input_source=ScriptedInput())
+    game.run_headless(60)                                           # warm-up: pools, text caches, projectile arrays
+
+    peaks = []
+    tracemalloc.start()
+    start, _ = tracemalloc.get_traced_memory()
+
+    for _ in range(ticks):
+        current, _ = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+        game.run_headless(1)
+        peaks.append(tracemalloc.get_traced_memory()[1] - current)
+
+    end, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    game = GameInitializer().initialize_game(headless=True, seed=seed, input_source=ScriptedInput())
+    game.run_headless(60)
+    counter = game.event_queue.enable_profiling(EventAllocationCounter())
+    game.run_headless(ticks)
+
+    return {
+        "ticks": ticks,
+        "events_per_tick": sum(counter.event_counts().values()) / ticks,
+        "new_events_per_tick": counter.new_events / ticks,
+        "new_event_bytes_per_tick": counter.new_event_bytes / ticks,
+        "peak_bytes_per_tick": statistics.mean(peaks),
+        "max_peak_bytes": max(peaks),
+        "retained_bytes_per_tick": (end - start) / ticks,
+        "event_instance_bytes": {
+            "KeyPressedEvent": instance_size(KeyPressedEvent(key=pygame.K_w)),
+            "RemoveEntityEvent": instance_size(RemoveEntityEvent(entity=None)),
+        },
+    }
+
+
+def measure(setup, run, repeat):                                    # seconds per run; only `run` is timed
+    timings = []
+
+    for _ in range(repeat):
+        if setup is not None:
+            setup()
+
+        start = time.perf_counter()
+        run()
+        timings.append(time.perf_counter() - start)
+
+    return {
+        "median": statistics.median(timings),
+        "min": min(timings),
+        "max": max(timings),
+        "repeat": repeat,
+    }
+
+
+def run_benchmarks(names, counts, repeat, seed=0):
+    results = {}
+
+    for name in names:
+        results[name] = {}
+        for count in counts:
+            setup, run = BENCHMARKS[name](BenchmarkScene(count, seed))
+            measure(setup, run, 1)                                  # warm-up: caches, lazily built arrays
+            results[name][str(count)] = measure(setup, run, repeat)
+
+    return {
+        "meta": {
+            "python": platform.python_version(),
+            "pygame": pygame.version.ver,
+            "platform": platform.platform(),
+            "repeat": repeat,
+            "seed": seed,
+        },
+        "results": results,
+    }
+
+
+def compare(results, baseline, threshold):                          # returns (name, count, baseline median, current median, ratio) rows and whether any regressed
+    rows = []
+    regressed = False
+
+    for name, by_count in results["results"].items():
+        for count, current in by_count.items():
+            previous = baseline["results"].get(name, {}).get(count)
+            if previous is None:
+                continue
+
+            ratio = current["median"] / previous["median"] if previous["median"] > 0 else float("inf")
+            rows.append((name, count, previous["median"], current["median"], ratio))
+            regressed = regressed or ratio > 1 + threshold
+
+    return rows, regressed
+
+
+def print_results(results):
+    for name, by_count in results["results"].items():
+        for count, timing in by_count.items():
+            print(f"{name:<20} n={count:<6} median {timing['median'] * 1000:9.3f} ms   min {timing['min'] * 1000:9.3f} ms")
+
+
+def print_comparison(rows, threshold):
+    for name, count, previous, current, ratio in rows:
+        flag = "  REGRESSION" if ratio > 1 + threshold else ""
+        print(f"{name:<20} n={count:<6} {previous * 1000:9.3f} ms -> {current * 1000:9.3f} ms  x{ratio:5.2f}{flag}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Microbenchmarks for the engine's per-tick hot paths")
+    parser.add_argument("--only", nargs="+", choices=list(BENCHMARKS), default=list(BENCHMARKS), help="benchmarks to run (default: all)")
+    parser.add_argument("--counts", type=int, nargs="+", default=DEFAULT_COUNTS, help="entity counts to run each benchmark at")
+    parser.add_argument("--repeat", type=int, default=DEFAULT_REPEAT, help="timed runs per benchmark and count")
+    parser.add_argument("--seed", type=int, default=0, help="seed for the generated arenas")
+    parser.add_argument("--output", metavar="PATH", help="write the results as JSON to PATH")
+    parser.add_argument("--baseline", metavar="PATH", help="compare against results previously written with --output")
+    parser.add_argument("--memory", action="store_true", help="also measure heap use per tick of a scripted headless match")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD, help="slowdown ratio above 1 that counts as a regression")
+    args = parser.parse_args()
+
+    pygame.init()
+    results = run_benchmarks(args.only, args.counts, args.repeat, args.seed)
+    print_results(results)
+
+    if args.memory:
+        results["memory"] = measure_tick_allocations(DEFAULT_MEMORY_TICKS, args.seed)
+        print(json.dumps(results["memory"], indent=2))
+
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump(results, file, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as file:
+            baseline = json.load(file)
+
+        rows, regressed = compare(results, baseline, args.threshold)
+        print()
+        print_comparison(rows, args.threshold)
+        sys.exit(1 if regressed else 0)
@@ -1,8 +1,11 @@
-from enum import Enum, IntEnum
+from enum import Enum, IntEnum, IntFlag
 
 import pygame
 
 
+TICK_RATE = 60              # simulation ticks per second; every duration the game counts in ticks assumes this rate
+
+
 class Direction(Enum):
     UP = (0, -1)
     DOWN = (0,  1)
@@ -26,6 +29,20 @@ class Control(IntEnum):
     DROP_BOMB = 6           #added a new logical game control for dropping bombs
 
 
+class CollisionLayer(IntFlag):
+    NONE = 0
+    TANK = 1
+    BULLET = 2
+    WALL = 4
+    TREE = 8
+    BOMB = 16
+    EFFECT = 32
+
+    @staticmethod
+    def can_collide(a, b):
+        return bool((a.COLLISION_MASK & b.COLLISION_LAYER) or (b.COLLISION_MASK & a.COLLISION_LAYER))
+
+
 pygame.init()
 pygame.font.init()
 
@@ -0,0 +1,48 @@
+from constants import Control, Direction
+
+
+class ControlState:                                                 # one player's controls: what is held right now, and what changed since the last poll
+    MOVE_DIRECTIONS = {                                             # when several move controls are held, the last one listed wins
+        Control.MOVE_UP: Direction.UP,
+        Control.MOVE_DOWN: Direction.DOWN,
+        Control.MOVE_LEFT: Direction.LEFT,
+        Control.MOVE_RIGHT: Direction.RIGHT,
+    }
+
+    def __init__(self):
+        self._held = set()
+        self._pressed = set()
+        self._released = set()
+
+    def press(self, control):
+        self._held.add(control)
+        self._pressed.add(control)
+
+    def release(self, control):
+        self._held.discard(control)
+        self._released.add(control)
+
+    def is_held(self, control):
+        return control in self._held
+
+    def was_pressed(self, control):
+        return control in self._pressed
+
+    def was_released(self, control):
+        return control in self._released
+
+    def movement_changed(self):
+        return not self._pressed.isdisjoint(self.MOVE_DIRECTIONS) or not self._released.isdisjoint(self.MOVE_DIRECTIONS)
+
+    def move_direction(self):                                       # None when no move control is held
+        direction = None
+
+        for control, move_direction in self.MOVE_DIRECTIONS.items():
+            if control in self._held:
+                direction = move_direction
+
+        return direction
+
+    def clear_transitions(self):                                    # called by whoever polls the state, once it has acted on this tick's changes
+        self._pressed.clear()
+        self._released.clear()
@@ -0,0 +1,344 @@
+from dataclasses import dataclass
+from enum import IntFlag
+from typing import Tuple
+
+import numpy as np
+from pygame import Color, Rect
+
+from constants import CollisionLayer, Control
+from controls import ControlState
+from entities import Tank, FastFiringTank, BigBulletTank, AlwaysMovingTank, RandomColorTank, Wall
+from utils import RANDOM_STREAMS, get_random_color
+
+
+class Component(IntFlag):                                           # which columns of a World row are meaningful for that entity
+    NONE = 0
+    POSITION = 1
+    VELOCITY = 2                                                    # moves by velocity every tick while moving is set
+    HEALTH = 4                                                      # takes damage, and is despawned once hp reaches 0
+    WEAPON = 8                                                      # fires bullets while fire_requested is set and its cooldown allows
+    RENDERABLE = 16
+    PROJECTILE = 32                                                 # damages what it hits, then is despawned
+    STEERED = 64                                                    # a tank: velocity follows facing and speed, and it stops at walls and tanks
+    COLOR_CYCLE = 128                                               # picks a new random color every color_change_ticks ticks
+
+
+@dataclass(frozen=True)
+class TankPreset:                                                   # a tank type as component values instead of a subclass
+    hp: int = 10
+    speed: int = 5
+    firing_delay: int = 20
+    bullet_damage: int = 1
+    bullet_speed: int = 10
+    bullet_size: Tuple[int, int] = (10, 10)
+    always_moving: bool = False
+    color_change_ticks: int = 0                                     # 0 keeps the color fixed
+
+
+TANK_PRESETS = {                                                    # the same numbers the Tank subclasses set up in their constructors
+    Tank: TankPreset(),
+    FastFiringTank: TankPreset(firing_delay=5),
+    BigBulletTank: TankPreset(bullet_damage=3, bullet_speed=6, bullet_size=(30, 30)),
+    AlwaysMovingTank: TankPreset(speed=10, always_moving=True),
+    RandomColorTank: TankPreset(color_change_ticks=RandomColorTank.COLOR_CHANGE_TICKS),
+}
+
+
+class World:                                                        # entities are row indices into columnar component arrays; systems work on whole columns
+    INITIAL_CAPACITY = 256
+    COLUMNS = {                                                     # name -> (shape of one row, dtype)
+        "components": ((), np.int64),
+        "layer": ((), np.int64),                                    # CollisionLayer of the entity
+        "position": ((2,), np.int64),                               # top left
+        "size": ((2,), np.int64),
+        "velocity": ((2,), np.int64),
+        "moving": ((), np.bool_),
+        "facing": ((2,), np.int64),                                 # a Direction value
+        "speed": ((), np.int64),
+        "always_moving": ((), np.bool_),
+        "hp": ((), np.int64),
+        "firing_delay": ((), np.int64),
+        "firing_cooldown": ((), np.int64),
+        "fire_requested": ((), np.bool_),
+        "bullet_damage": ((), np.int64),
+        "bullet_speed": ((), np.int64),
+        "bullet_size": ((2,), np.int64),
+        "damage": ((), np.int64),
+        "owner": ((), np.int64),                                    # entity id of the tank that fired a projectile
+        "color": ((3,), np.uint8),
+        "color_change_ticks": ((), np.int64),
+        "color_timer": ((), np.int64),
+        "player_id": ((), np.int64),
+    }
+
+    def __init__(self, width, height, capacity=INITIAL_CAPACITY, systems=None):
+        self._width = width
+        self._height = height
+        self._systems = systems
+        self._capacity = capacity
+        self._count = 0                                             # rows in use, including despawned ones waiting in the free list
+        self._free_ids = []
+        self._controls = {}
+        for name, (shape, dtype) in self.COLUMNS.items():
+            setattr(self, name, np.zeros((capacity,) + shape, dtype=dtype))
+
+    @classmethod
+    def from_entities(cls, entities, width, height):                # tanks and walls of an existing match; everything else has no ECS equivalent yet
+        world = cls(width, height)
+        tanks = {}
+
+        for entity in entities:
+            if isinstance(entity, Tank):
+                tanks[entity] = world.spawn_tank(entity.player_id, entity.rect.topleft, entity.color, TANK_PRESETS[type(entity)])
+                world.hp[tanks[entity]] = entity.hp
+            elif isinstance(entity, Wall):
+                world.spawn_wall(entity.rect.topleft, entity.hp)
+
+        return world, tanks
+
+    def __len__(self):
+        return self._count - len(self._free_ids)
+
+    @property
+    def width(self):
+        return self._width
+
+    @property
+    def height(self):
+        return self._height
+
+    @property
+    def controls(self):
+        return self._controls
+
+    def ids_with(self, components):                                 # ids of every entity that has all of components, in id order
+        return np.flatnonzero((self.components[:self._count] & components) == components)
+
+    def spawn(self, components, **values):
+        return self.spawn_many(1, components, **values)[0]
+
+    def spawn_many(self, count, components, **values):              # values are scalars or one row per new entity
+        ids = self._allocate(count)
+        for name in self.COLUMNS:
+            column = getattr(self, name)
+            column[ids] = values.get(name, 0)
+        self.components[ids] = components
+        return ids
+
+    def spawn_tank(self, player_id, coords, color, preset=TANK_PRESETS[Tank]):
+        components = Component.POSITION | Component.VELOCITY | Component.HEALTH | Component.WEAPON | Component.RENDERABLE | Component.STEERED
+        if preset.color_change_ticks:
+            components |= Component.COLOR_CYCLE
+
+        return self.spawn(
+            components,
+            layer=CollisionLayer.TANK,
+            position=coords,
+            size=(Tank.WIDTH, Tank.HEIGHT),
+            moving=preset.always_moving,
+            facing=(0, -1),
+            speed=preset.speed,
+            always_moving=preset.always_moving,
+            hp=preset.hp,
+            firing_delay=preset.firing_delay,
+            bullet_damage=preset.bullet_damage,
+            bullet_speed=preset.bullet_speed,
+            bullet_size=preset.bullet_size,
+            color=tuple(Color(color))[:3],
+            color_change_ticks=preset.color_change_ticks,
+            player_id=player_id,
+        )
+
+    def spawn_wall(self, coords, hp=3):
+        return self.spawn(
+            Component.POSITION | Component.HEALTH | Component.RENDERABLE,
+            layer=CollisionLayer.WALL,
+            position=coords,
+            size=(Wall.WIDTH, Wall.HEIGHT),
+            hp=hp,
+            color=tuple(Color(Wall.COLOR))[:3],
+        )
+
+    def despawn(self, ids):
+        ids = np.asarray(ids, dtype=np.int64).reshape(-1)
+        ids = ids[self.components[ids] != Component.NONE]           # despawning twice is harmless
+        self.components[ids] = Component.NONE
+        self._free_ids.extend(ids.tolist())
+        for entity_id in ids.tolist():
+            self._controls.pop(entity_id, None)
+
+    def bind_controls(self, entity_id, control_state=None):         # the ECS counterpart of mapping a player's keys to a tank
+        control_state = control_state or ControlState()
+        self._controls[int(entity_id)] = control_state
+        return control_state
+
+    def rect_of(self, entity_id):
+        return Rect(*self.position[entity_id], *self.size[entity_id])
+
+    def bounds(self, ids):                                          # (left, top, right, bottom) rows for ids
+        topleft = self.position[ids]
+        return np.hstack((topleft, topleft + self.size[ids]))
+
+    def tick(self):
+        for system in self._systems if self._systems is not None else DEFAULT_SYSTEMS:
+            system(self)
+
+    def _allocate(self, count):
+        reused = self._free_ids[-count:] if count else []
+        del self._free_ids[len(self._free_ids) - len(reused):]
+
+        new = count - len(reused)
+        if self._count + new > self._capacity:
+            self._grow(self._count + new)
+
+        ids = np.array(reused + list(range(self._count, self._count + new)), dtype=np.int64)
+        self._count += new
+        return ids
+
+    def _grow(self, needed):
+        capacity = self._capacity
+        while capacity < needed:
+            capacity *= 2
+
+        for name in self.COLUMNS:
+            column = getattr(self, name)
+            resized = np.zeros((capacity,) + column.shape[1:], dtype=column.dtype)
+            resized[:self._capacity] = column
+            setattr(self, name, resized)
+        self._capacity = capacity
+
+
+def _overlaps(a, b):                                                # same test as pygame.Rect.colliderect, for every row of a against every row of b
+    return (a[:, None, 0] < b[None, :, 2]) & (b[None, :, 0] < a[:, None, 2]) \
+        & (a[:, None, 1] < b[None, :, 3]) & (b[None, :, 1] < a[:, None, 3])
+
+
+def cooldown_system(world):
+    ids = world.ids_with(Component.WEAPON)
+    cooldowns = world.firing_cooldown[ids]
+    world.firing_cooldown[ids] = np.maximum(cooldowns - 1, 0)
+
+
+def control_system(world):                                          # same rules as Tank._poll_controls; one step per player, not per entity
+    for entity_id, controls in world.controls.items():
+        if controls.movement_changed():
+            direction = controls.move_direction()
+            if direction is None:
+                world.moving[entity_id] = world.always_moving[entity_id]
+            else:
+                world.moving[entity_id] = True
+                world.facing[entity_id] = direction.value
+
+        world.fire_requested[entity_id] = controls.is_held(Control.FIRE_BULLET)
+        controls.clear_transitions()
+
+
+def weapon_system(world):
+    ids = world.ids_with(Component.WEAPON)
+    ids = ids[world.fire_requested[ids] & (world.firing_cooldown[ids] == 0)]
+    if not len(ids):
+        return
+
+    world.firing_cooldown[ids] = world.firing_delay[ids] + 1
+    sizes = world.bullet_size[ids]
+    centers = world.position[ids] + world.size[ids] // 2
+
+    world.spawn_many(
+        len(ids),
+        Component.POSITION | Component.VELOCITY | Component.RENDERABLE | Component.PROJECTILE,
+        layer=CollisionLayer.BULLET,
+        position=centers - sizes // 2,                              # centered on the tank, like Bullet
+        size=sizes,
+        velocity=world.facing[ids] * world.bullet_speed[ids][:, None],
+        moving=True,
+        damage=world.bullet_damage[ids],
+        owner=ids,
+        color=world.color[ids],
+    )
+
+
+def movement_system(world):
+    tanks = world.ids_with(Component.STEERED)
+    world.velocity[tanks] = world.facing[tanks] * world.speed[tanks][:, None]
+
+    movers = world.ids_with(Component.VELOCITY)
+    movers = movers[world.moving[movers]]
+    old_positions = world.position[movers]
+    world.position[movers] += world.velocity[movers]
+
+    steered = (world.components[movers] & Component.STEERED) != 0
+    tanks = movers[steered]
+    limits = np.array([world.width, world.height]) - world.size[tanks]
+    world.position[tanks] = np.clip(world.position[tanks], 0, limits)   # tanks stay inside the arena
+
+    _undo_blocked_moves(world, tanks, old_positions[steered])
+
+    bullets = world.ids_with(Component.PROJECTILE)
+    bounds = world.bounds(bullets)
+    outside = (bounds[:, 2] <= 0) | (bounds[:, 3] <= 0) | (bounds[:, 0] >= world.width) | (bounds[:, 1] >= world.height)
+    world.despawn(bullets[outside])
+
+
+def _undo_blocked_moves(world, tanks, old_positions):               # same rule as MovementEventHandler: a tank that ends up in a wall or tank goes back
+    solids = world.ids_with(Component.POSITION)
+    solids = solids[(world.layer[solids] & (CollisionLayer.WALL | CollisionLayer.TANK)) != 0]
+    undone = (_overlaps(world.bounds(tanks), world.bounds(solids)) & (tanks[:, None] != solids[None, :])).any(axis=1)
+    kept = ~undone
+
+    while undone.any():                                             # a tank sent back can block one that had moved into its way,
+        world.position[tanks[undone]] = old_positions[undone]       # so later passes only test the kept tanks against those
+        rows = np.flatnonzero(kept)
+        blocked = rows[_overlaps(world.bounds(tanks[rows]), world.bounds(tanks[undone])).any(axis=1)]
+        undone = np.zeros(len(tanks), dtype=np.bool_)
+        undone[blocked] = True
+        kept[blocked] = False
+
+
+def collision_system(world):                                        # bullets damage every wall and enemy tank they overlap, and bullets cancel each other out
+    bullets = world.ids_with(Component.PROJECTILE)
+    if not len(bullets):
+        return
+
+    targets = world.ids_with(Component.HEALTH)
+    bullet_bounds = world.bounds(bullets)
+
+    hits = _overlaps(bullet_bounds, world.bounds(targets)) & (world.owner[bullets][:, None] != targets[None, :])
+    bullet_rows, target_rows = np.nonzero(hits)
+    np.subtract.at(world.hp, targets[target_rows], world.damage[bullets[bullet_rows]])
+    world.hp[targets] = np.maximum(world.hp[targets], 0)
+
+    cancelled = np.triu(_overlaps(bullet_bounds, bullet_bounds), k=1)
+    used_up = hits.any(axis=1) | cancelled.any(axis=0) | cancelled.any(axis=1)
+    world.despawn(bullets[used_up])
+
+
+def death_system(world):
+    ids = world.ids_with(Component.HEALTH)
+    world.despawn(ids[world.hp[ids] == 0])
+
+
+def color_cycle_system(world):
+    ids = world.ids_with(Component.COLOR_CYCLE)
+    world.color_timer[ids] += 1
+
+    changed = ids[world.color_timer[ids] >= world.color_change_ticks[ids]]
+    world.color_timer[changed] = 0
+    for entity_id in changed.tolist():                              # one draw per tank from the colors stream, as RandomColorTank does
+        world.color[entity_id] = tuple(get_random_color(RANDOM_STREAMS.colors))[:3]
+
+
+def render_system(world, display):                                  # flat-colored rects in id order; not part of a tick, call it once per frame
+    ids = world.ids_with(Component.RENDERABLE)
+    for (left, top, right, bottom), color in zip(world.bounds(ids).tolist(), world.color[ids].tolist()):
+        display.fill(color, (left, top, right - left, bottom - top))
+
+
+DEFAULT_SYSTEMS = (                                                 # the order a Tank's tick runs in: cooldowns, controls, firing, then movement
+    cooldown_system,
+    control_system,
+    weapon_system,
+    movement_system,
+    collision_system,
+    death_system,
+    color_cycle_system,
+)
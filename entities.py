@@ -1,73 +1,323 @@
 from __future__ import annotations
 
-import random                           # imported random to randomize the bomb timer
+import hashlib
+from collections import defaultdict
+
+import numpy as np
 import pygame
-from pygame import Surface
+from pygame import Rect, Surface
 
 from abstractions import AbstractGameEntity, IControllable, DamageableTrait
-from constants import Direction, FONT, BOMB_FONT                                          # import BOMB_FONT
-from events import FireBulletEvent, DropBombEvent, BombExplodeEvent, RemoveEntityEvent    # import DropBombEvent and BombExplodeEvent
-from utils import get_random_color, collision                                             # import helper functions get_random_color for RandomColorTank and collision for rect-circle collision
+from constants import CollisionLayer, Control, Direction, FONT, BOMB_FONT, TICK_RATE                          # import BOMB_FONT
+from projectiles import ProjectileSystem
+from rendering import RenderSnapshot, TerrainLayer
+from spatial import SpatialGrid, sweep_and_prune
+from pools import ENTITY_POOL
+from events import FireBulletEvent, DropBombEvent, BombExplodeEvent    # import DropBombEvent and BombExplodeEvent
+from utils import RANDOM_STREAMS, get_random_color, circle_rect_collisions, render_text   # import helper functions get_random_color for RandomColorTank and circle_rect_collisions for bomb blasts
 
 
 class GameEntityManager:
 
     def __init__(self, display):
-        self._entities = []
+        self._entities = {}                                                             # insertion-ordered set: O(1) register and unregister, iterated in registration order
+        self._scheduled_removals = {}
+        self._removed_bullets = []
+        self._entities_by_type = defaultdict(dict)                                      # concrete type -> its entities; kept up to date so queries never scan
+        self._moving_entities = {}                                                      # entities with is_moving_simultaneously set
+        self._grid = SpatialGrid()                                                      # uniform grid index so collision queries only look at nearby entities
+        self._projectiles = ProjectileSystem()                                          # bullets are simulated in bulk instead of as individual entities
         self._display = display
+        self._terrain = TerrainLayer(display) if display is not None else None         # walls and trees are drawn from pre-baked surfaces; a headless game has no display
+        self._overlay_entities = {}                                                     # everything else, in draw order
+        self._draw_orders = {}
+        self._next_draw_order = 0
+        self._dirty_entities = None                                                     # only tracked once a dirty-rect renderer asks for it
+        self._drawn_rects = {}
+        self._drawn_bullet_rects = []
+        self._previous_positions = {}                                                   # where this tick's movers started, for drawing between two ticks
+        self._frozen_surfaces = {}                                                      # entity -> copy of its surface for render snapshots, dropped when it repaints
+
+    @property
+    def projectiles(self):
+        return self._projectiles
+
+    def refresh_display(self, alpha=1.0):                                               # alpha < 1 draws movers that far from their previous to their current position
+        if self._display is None:
+            return
+
+        self._terrain.draw_ground(self._display)
+        self._draw_overlay(self._overlay_entities, alpha=alpha)
+        self._projectiles.draw(self._display, alpha=alpha)
+
+    def refresh_display_area(self, area):                                              # redraws only what overlaps area, in the same order as refresh_display
+        entities = [
+            entity for entity in self._grid.query(area)
+            if entity in self._overlay_entities and entity.rect.colliderect(area)
+        ]
+        entities.sort(key=self._draw_orders.__getitem__)
+
+        self._terrain.draw_ground(self._display, area)
+        self._draw_overlay(entities, area)
+        self._projectiles.draw(self._display, area)
+
+    def _draw_overlay(self, entities, area=None, alpha=1.0):                            # trees stay above whatever was registered before them, e.g. tanks
+        canopy_order = self._terrain.canopy_order
+        canopy_drawn = canopy_order is None
+
+        for entity in entities:
+            if not canopy_drawn and self._draw_orders[entity] > canopy_order:
+                self._terrain.draw_canopy(self._display, area)
+                canopy_drawn = True
+
+            if alpha < 1 and entity in self._previous_positions:
+                self._display.blit(entity.surf, self._drawn_topleft(entity, alpha))
+            else:
+                entity.on_display_refresh(self._display)
+
+        if not canopy_drawn:
+            self._terrain.draw_canopy(self._display, area)
+
+    def _drawn_topleft(self, entity, alpha):                                            # where a frame alpha of the way from the previous tick shows the entity
+        left, top = entity.rect.topleft
+        previous = self._previous_positions.get(entity) if alpha < 1 else None
+        if previous is None:
+            return left, top
+
+        return previous[0] + int((left - previous[0]) * alpha), previous[1] + int((top - previous[1]) * alpha)
+
+    def snapshot(self, alpha=1.0):                                                      # what refresh_display(alpha) would draw, as copies that later ticks leave alone
+        blits = [(self._terrain.ground_snapshot(), (0, 0))]
+        canopy = self._terrain.canopy_snapshot()
+        canopy_order = self._terrain.canopy_order
+        canopy_drawn = canopy is None
+
+        for entity in self._overlay_entities:
+            if not canopy_drawn and self._draw_orders[entity] > canopy_order:
+                blits.append((canopy, (0, 0)))
+                canopy_drawn = True
+
+            blits.append((self._frozen_surface(entity), self._drawn_topleft(entity, alpha)))
+
+        if not canopy_drawn:
+            blits.append((canopy, (0, 0)))
+
+        blits.extend(self._projectiles.frozen_blits(alpha))
+        return RenderSnapshot(blits=tuple(blits))
+
+    def _frozen_surface(self, entity):
+        surface = self._frozen_surfaces.get(entity)
+        if surface is None:
+            surface = self._frozen_surfaces[entity] = entity.surf.copy()
+        return surface
+
+    def enable_dirty_tracking(self):
+        if self._dirty_entities is None:
+            self._dirty_entities = dict.fromkeys(self._entities)
+
+    def collect_dirty_rects(self):                                                     # previous and current rects of everything that changed since the last call
+        dirty_rects = []
+
+        for entity in self._dirty_entities:
+            drawn_rect = self._drawn_rects.pop(entity, None)
+            if drawn_rect is not None:
+                dirty_rects.append(drawn_rect)
 
-    def refresh_display(self):
-        for entity in self._entities:
-            entity.on_display_refresh(self._display)
+            if entity in self._draw_orders:
+                drawn_rect = entity.rect.copy()
+                self._drawn_rects[entity] = drawn_rect
+                dirty_rects.append(drawn_rect)
+
+        self._dirty_entities.clear()
+
+        bullet_rects = self._projectiles.rects()                                        # bullets move every tick, so they are always dirty
+        dirty_rects.extend(self._drawn_bullet_rects)
+        dirty_rects.extend(bullet_rects)
+        self._drawn_bullet_rects = bullet_rects
+
+        return dirty_rects
 
     def register_entity(self, entity):
-        self._entities.append(entity)
+        if isinstance(entity, Bullet):
+            self._projectiles.add(entity)
+            return
+
+        self._entities[entity] = None
+        self._entities_by_type[type(entity)][entity] = None
+        if entity.is_moving_simultaneously:
+            self._moving_entities[entity] = None
+        self._grid.insert(entity)
+        self._draw_orders[entity] = self._next_draw_order                              # also the registration order queries are returned in
+        self._next_draw_order += 1
+        self._mark_dirty(entity)
+        entity.listener = self
+
+        if entity.COLLISION_LAYER & Bullet.COLLISION_MASK:
+            self._projectiles.add_target(entity)
+
+        if self._terrain is None:
+            return
+
+        if isinstance(entity, Wall):
+            self._terrain.add_ground(entity)
+        elif isinstance(entity, Tree):
+            self._terrain.add_canopy(entity, self._draw_orders[entity])
+        else:
+            self._overlay_entities[entity] = None
 
     def register_entities(self, entities):
         for entity in entities:
             self.register_entity(entity)
 
-    def unregister_entity(self, entity):
+    def unregister_entity(self, entity):                                               # returns whether the entity was registered
         entity.remove()
-        if entity in self._entities:
-            self._entities.remove(entity)
+        if isinstance(entity, Bullet):
+            return self._projectiles.remove(entity)
+
+        if entity not in self._entities:
+            return False
+
+        del self._entities[entity]
+        del self._entities_by_type[type(entity)][entity]
+        self._moving_entities.pop(entity, None)
+        self._grid.remove(entity)
+        del self._draw_orders[entity]
+        self._overlay_entities.pop(entity, None)
+        if self._terrain is not None:
+            self._terrain.remove(entity)
+        self._mark_dirty(entity)
+        self._projectiles.remove_target(entity)
+        self._frozen_surfaces.pop(entity, None)
+        entity.listener = None
+        return True
+
+    def schedule_removal(self, entity):                                                 # removed in one batch by remove_scheduled; until then it is left out
+        if isinstance(entity, Bullet):                                                  # of collision queries and tick callbacks, as if already gone
+            if self.unregister_entity(entity):                                          # bullets still leave the projectile arrays at once: their swap-remove
+                self._removed_bullets.append(entity)                                    # order decides the order of later collisions
+            return
+
+        entity.mark_for_removal()
+        self._grid.remove(entity)
+        self._scheduled_removals[entity] = None
+
+    def remove_scheduled(self):                                                         # returns the scheduled entities that were actually registered
+        removed = self._removed_bullets
+        removed.extend(entity for entity in self._scheduled_removals if self.unregister_entity(entity))
+        self._removed_bullets = []
+        self._scheduled_removals.clear()
+        return removed
 
     def unregister_all_inside(self, rect, predicate=None):
-        for entity in self._entities[:]:
+        for entity in self._grid.query(rect):
             if (not predicate or predicate(entity)) and entity.rect.colliderect(rect):
                 self.unregister_entity(entity)
 
+    def on_entity_moved(self, entity):
+        self._grid.update(entity)
+        self._mark_dirty(entity)
+
+    def on_entity_moving_changed(self, entity):
+        if entity.is_moving_simultaneously:
+            self._moving_entities[entity] = None
+        else:
+            self._moving_entities.pop(entity, None)
+
+    def on_entity_repainted(self, entity):
+        self._frozen_surfaces.pop(entity, None)
+        self._mark_dirty(entity)
+
+    def _mark_dirty(self, entity):
+        if self._dirty_entities is not None:
+            self._dirty_entities[entity] = None
+
     def notify_tick_start(self):
-        for entity in self._entities[:]:
-            entity.on_tick_start()
+        for entity in list(self._entities):
+            if not entity.is_marked_for_removal:
+                entity.on_tick_start()
 
     def notify_tick_end(self):
-        for entity in self._entities[:]:
-            entity.on_tick_end()
+        for entity in list(self._entities):
+            if not entity.is_marked_for_removal:
+                entity.on_tick_end()
 
     def get_entities(self, predicate=None):
         if predicate is None:
-            return self._entities.copy()
+            return list(self._entities)
 
         return [entity for entity in self._entities if predicate(entity)]
 
-    def get_collided_with(self, entity):
-        local_entities = self._entities.copy()
-        local_entities.remove(entity)
-        local_entities2 = []                                                            # create new empty list for entities which fall within (circle/radius) explosion collision
+    def get_entities_of_type(self, entity_type):                                        # includes subclasses; costs one step per registered type, not per entity
+        entities = [
+            entity for concrete_type, entities in self._entities_by_type.items() if issubclass(concrete_type, entity_type)
+            for entity in entities
+        ]
+        return sorted(entities, key=self._draw_orders.__getitem__)
+
+    def get_moving_entities(self):                                                      # in registration order, like get_entities, so movement resolves the same way
+        return sorted(self._moving_entities, key=self._draw_orders.__getitem__)
+
+    def remember_positions(self, entities):                                             # called with the movers just before they move
+        self._previous_positions = {entity: entity.rect.topleft for entity in entities}
 
+    def get_collided_with(self, entity):
         if isinstance(entity, Bomb):                                                    # differentiate Bomb Explosion's collision with Bullet collision
-            for local_entity in local_entities:
-                if collision(local_entity.rect, entity.center, entity.radius):
-                    local_entities2.append(local_entity)                                # append entity to the said empty list when a (rect-circle) collision happens
-            return local_entities2                                                      # return entities which fall within rect-circle collision
-        else:                                                                           # else rect-rect collision
-            return pygame.sprite.spritecollide(entity, local_entities, dokill=False)
+            return [
+                other for other in self.get_entities_in_radius(entity.center, entity.radius, entity.COLLISION_MASK)
+                if other is not entity
+            ]
+
+        return [                                                                        # else rect-rect collision, with the layer/mask check before any geometry test
+            other for other in self._grid.query(entity.rect)
+            if other is not entity and entity.COLLISION_MASK & other.COLLISION_LAYER and entity.rect.colliderect(other.rect)
+        ]
+
+    def state_digest(self):                                                             # fingerprint of the simulation state, used to check that a replay matches its recording
+        digest = hashlib.sha256()
+
+        for entity in list(self._entities) + self._projectiles.bullets:
+            digest.update(repr(entity.digest_state()).encode())
+        digest.update(repr(RANDOM_STREAMS.getstate()).encode())
+
+        return digest.hexdigest()
+
+    def get_entities_in_radius(self, center, radius, mask):                            # area-of-effect query: every candidate rect is tested in one array operation
+        area = Rect(0, 0, radius * 2, radius * 2)
+        area.center = center
+
+        candidates = [entity for entity in self._grid.query(area) if entity.COLLISION_LAYER & mask]
+        if not candidates:
+            return []
+
+        hits = circle_rect_collisions(center, radius, [entity.rect for entity in candidates])
+        return [candidates[index] for index in np.flatnonzero(hits)]
+
+    def get_colliding_pairs(self, colliders):                                          # unique overlapping pairs involving at least one collider, from a single sweep
+        colliders = dict.fromkeys(colliders)
+        candidates = dict(colliders)
+
+        for collider in colliders:
+            candidates.update(dict.fromkeys(
+                other for other in self._grid.query(collider.rect)
+                if CollisionLayer.can_collide(collider, other)
+            ))
+
+        pairs = [
+            (first, second) for first, second in sweep_and_prune(candidates)
+            if first in colliders or second in colliders
+        ]
+        pairs.extend(self._projectiles.get_colliding_pairs())                          # bullets are tested against their targets in one batch
+
+        return pairs
 
 
 class Tank(DamageableTrait, AbstractGameEntity, IControllable):
     WIDTH = 50
     HEIGHT = 50
+    COLLISION_LAYER = CollisionLayer.TANK
+    COLLISION_MASK = CollisionLayer.WALL | CollisionLayer.TANK
+    repaints = 0                                                # shared by every tank type; see rerender_if_changed
+    skipped_repaints = 0
 
     def __init__(self, event_queue, player_id, coords, color, hp=10, speed=5, firing_delay=20, bombing_delay = 60):         # added bombing_delay for bomb cooldowns
         super().__init__(event_queue=event_queue, hp=hp)
@@ -80,6 +330,7 @@ class Tank(DamageableTrait, AbstractGameEntity, IControllable):
         self._firing_tick_cooldown = 0
         self._bombing_tick_cooldown = 0                         # added a new attribute _bombing_tick_cooldown initially set to 0
         self._color = color
+        self._control_state = None                              # set when a player's keys are mapped to this tank
 
         self._surf = Surface((self.WIDTH, self.HEIGHT))
         self._rect = self._surf.get_rect()
@@ -98,14 +349,41 @@ class Tank(DamageableTrait, AbstractGameEntity, IControllable):
     def color(self):
         return self._color
 
+    @property
+    def control_state(self):
+        return self._control_state
+
+    @control_state.setter
+    def control_state(self, value):
+        self._control_state = value
+
     def rerender(self):
+        Tank.repaints += 1
+        self._rendered_state = self._visual_state()
+        self._notify_repainted()
+        if pygame.display.get_surface() is None:               # headless: nothing ever draws the surface, so it is left unpainted
+            return
+
         self._surf.fill(self.color)
-        hp_text = FONT.render(str(self._hp), True, "white")
+        hp_text = render_text(FONT, str(self._hp), "white")
         hp_rect = hp_text.get_rect(center=self._surf.get_rect().center)
         self._surf.blit(hp_text, hp_rect)
 
+    def rerender_if_changed(self):                              # only repaint when something that is drawn has changed
+        if self._visual_state() == self._rendered_state:
+            Tank.skipped_repaints += 1
+        else:
+            self.rerender()
+
+    def _visual_state(self):
+        return (self._hp, self._color)
+
+    def digest_state(self):
+        return super().digest_state() + (
+            self._facing.name, self._firing_tick_cooldown, self._bombing_tick_cooldown, repr(self._color))
+
     def on_tick_end(self):
-        self.rerender()
+        self.rerender_if_changed()
 
     @property
     def speed(self):
@@ -122,7 +400,8 @@ class Tank(DamageableTrait, AbstractGameEntity, IControllable):
                 FireBulletEvent(source=self, bullet=bullet))
 
     def bullet_to_fire(self):
-        return Bullet(
+        return ENTITY_POOL.acquire(
+            Bullet,
             event_queue=self._event_queue,
             center=self.rect.center,
             owner=self,
@@ -141,7 +420,8 @@ class Tank(DamageableTrait, AbstractGameEntity, IControllable):
                 DropBombEvent(source=self, bomb=bomb))
 
     def bomb_to_drop(self):                         # new method that returns a bomb instance
-        return Bomb(
+        return ENTITY_POOL.acquire(
+            Bomb,
             event_queue=self._event_queue,
             center=self.rect.center,
             owner=self
@@ -164,6 +444,28 @@ class Tank(DamageableTrait, AbstractGameEntity, IControllable):
         if self._bombing_tick_cooldown > 0:         # added one for bomb cooldown
             self._bombing_tick_cooldown -= 1
 
+        self._poll_controls()
+
+    def _poll_controls(self):                       # acts on the player's input once per tick; a key held down costs nothing until it is released
+        controls = self._control_state
+        if controls is None:
+            return
+
+        if controls.movement_changed():
+            direction = controls.move_direction()
+            if direction is None:
+                self.do_move_stop_control()
+            else:
+                self.do_move_control(direction)
+
+        if controls.is_held(Control.FIRE_BULLET):
+            self.do_fire_control()
+
+        if controls.is_held(Control.DROP_BOMB):
+            self.do_drop_control()
+
+        controls.clear_transitions()
+
     @property
     def surf(self):
         return self._surf
@@ -187,7 +489,8 @@ class BigBulletTank(Tank):
         super().__init__(event_queue=event_queue, player_id=player_id, coords=coords, color=color)
 
     def bullet_to_fire(self):
-        bullet = Bullet(
+        bullet = ENTITY_POOL.acquire(
+            Bullet,
             event_queue=self._event_queue,
             center=self.rect.center,
             owner=self,
@@ -215,24 +518,38 @@ class AlwaysMovingTank(Tank):
 
 
 class RandomColorTank(Tank):                                                                                # a Tank subclass with methods that randomly changes the
-    def __init__(self, event_queue, player_id, coords, color):                                              # tank's color every 1/5 of a second (200 ms), and rerenders
-        super().__init__(event_queue=event_queue, player_id=player_id, coords=coords, color=color)          # said color into the tank after one tick
+    COLOR_CHANGE_TICKS = TICK_RATE // 5                                                                     # tank's color every 1/5 of a second (200 ms, counted in
+                                                                                                            # ticks so replays match), and rerenders
+    def __init__(self, event_queue, player_id, coords, color):                                              # said color into the tank after one tick
+        super().__init__(event_queue=event_queue, player_id=player_id, coords=coords, color=color)
         self.color_timer = 0
 
     def change_color(self):
-        if pygame.time.get_ticks() - self.color_timer > 200:
-            self.color_timer = pygame.time.get_ticks()
-            self._color = get_random_color()
+        self.color_timer += 1
+        if self.color_timer >= self.COLOR_CHANGE_TICKS:
+            self.color_timer = 0
+            self._color = get_random_color(RANDOM_STREAMS.colors)
 
     def on_tick_end(self):
         self.change_color()
-        self.rerender()
+        self.rerender_if_changed()
+
+    def digest_state(self):
+        return super().digest_state() + (self.color_timer,)
 
 
 class Bullet(AbstractGameEntity):
+    COLLISION_LAYER = CollisionLayer.BULLET
+    COLLISION_MASK = CollisionLayer.TANK | CollisionLayer.WALL | CollisionLayer.BULLET | CollisionLayer.BOMB
 
     def __init__(self, event_queue, center, owner, color, direction, damage=1, speed=10, width=10, height=10):
         super().__init__(event_queue)
+        self._projectiles = None                                    # set while a ProjectileSystem owns this bullet's position
+        self._surf = None
+        self.reset(event_queue, center, owner, color, direction, damage, speed, width, height)
+
+    def reset(self, event_queue, center, owner, color, direction, damage=1, speed=10, width=10, height=10):      # reinitializes a pooled bullet in place
+        self._reinitialize(event_queue)
         self._owner = owner
         self._damage = damage
         self._speed = speed
@@ -241,17 +558,40 @@ class Bullet(AbstractGameEntity):
         self._width = width
         self._height = height
 
-        self._surf = Surface((self._width, self._height))
+        if self._surf is None or self._surf.get_size() != (width, height):
+            self._surf = Surface((self._width, self._height))
         self._surf.fill(color)
 
         self._rect = self._surf.get_rect()
         self._rect.center = center
 
-        self._is_moving_simultaneously = True
+    def attach(self, projectiles):
+        self._projectiles = projectiles
+
+    def detach(self):
+        self._rect.topleft = self._projectiles.position_of(self)
+        self._projectiles = None
+
+    def move_to(self, coords):
+        if self._projectiles is not None:
+            self._projectiles.move_to(self, coords)
+        else:
+            super().move_to(coords)
+
+    def move_by_delta(self, delta):
+        left, top = self.rect.topleft
+        self.move_to((left + delta[0], top + delta[1]))
 
     def move_by_current_facing(self):
         self.move_by_direction(self._facing, self._speed)
 
+    @property
+    def velocity(self):
+        return self._compute_movement_delta(self._facing, self._speed)
+
+    def digest_state(self):
+        return super().digest_state() + (self.velocity, self._damage, self._owner.player_id)
+
     @property
     def damage(self):
         return self._damage
@@ -266,6 +606,8 @@ class Bullet(AbstractGameEntity):
 
     @property
     def rect(self):
+        if self._projectiles is not None:
+            self._rect.topleft = self._projectiles.position_of(self)
         return self._rect
 
 
@@ -273,6 +615,7 @@ class Wall(DamageableTrait, AbstractGameEntity):
     WIDTH = 30
     HEIGHT = 30
     COLOR = "brown"
+    COLLISION_LAYER = CollisionLayer.WALL
 
     def __init__(self, event_queue, coords, hp=3):
         super().__init__(event_queue=event_queue, hp=hp)
@@ -299,6 +642,7 @@ class Tree(AbstractGameEntity):
     WIDTH = 100
     HEIGHT = 100
     COLOR = "green"
+    COLLISION_LAYER = CollisionLayer.TREE                   # nothing masks trees, so they never take part in collisions
 
     def __init__(self, event_queue, coords):
         super().__init__(event_queue)
@@ -319,22 +663,32 @@ class Tree(AbstractGameEntity):
 
 class DamageText(AbstractGameEntity):
     COLOR = "white"
+    COLLISION_LAYER = CollisionLayer.EFFECT
 
     def __init__(self, event_queue, center, damage, speed=2, tick_length=30):
         super().__init__(event_queue)
+        self.reset(event_queue, center, damage, speed, tick_length)
+
+    def reset(self, event_queue, center, damage, speed=2, tick_length=30):                  # reinitializes a pooled damage text in place
+        self._reinitialize(event_queue)
 
         self._speed = speed
         self._ticks_left = tick_length
 
-        self._surf = FONT.render(str(damage), True, "white")
-        self._rect = self._surf.get_rect(center=center)
+        if pygame.display.get_surface() is None:                                            # headless: only the size is needed, and the font
+            self._surf = None                                                               # measures it without rendering anything
+            self._rect = Rect((0, 0), FONT.size(str(damage)))
+            self._rect.center = center
+        else:
+            self._surf = render_text(FONT, str(damage), self.COLOR)
+            self._rect = self._surf.get_rect(center=center)
 
     def on_tick_start(self):
         self._ticks_left -= 1
-        self._rect.move_ip((0, -self._speed))
+        self.move_by_delta((0, -self._speed))
 
         if self._ticks_left <= 0:
-            self.queue_event_at_tail(RemoveEntityEvent(entity=self))
+            self.queue_event_at_tail(self.removal_event)
 
     @property
     def surf(self):
@@ -347,54 +701,87 @@ class DamageText(AbstractGameEntity):
 
 class Bomb(DamageableTrait, AbstractGameEntity):                    # new Bomb class
     COLOR = "red"
+    COLLISION_LAYER = CollisionLayer.BOMB
+    COLLISION_MASK = CollisionLayer.TANK | CollisionLayer.WALL | CollisionLayer.BOMB
+    repaints = 0
+    skipped_repaints = 0
 
     def __init__(self, event_queue, center, owner, damage = 0, hp = 3, width=20, height=20, radius = 100):       # hardcode radius to be 100, and initially set bomb damage to zero (will be changed during actual explosion)
         super().__init__(event_queue=event_queue, hp=hp)
+        self._surf = None
+        self.reset(event_queue, center, owner, damage, hp, width, height, radius)
+
+    def reset(self, event_queue, center, owner, damage = 0, hp = 3, width=20, height=20, radius = 100):         # reinitializes a pooled bomb in place
+        self._reinitialize(event_queue)
 
+        self._hp = hp
         self._owner = owner
         self._damage = damage
         self._center = center
         self._width = width
         self._height = height
-        self._timer = float(random.randint(3,10))                   # converts randint to float for easier processing
+        self._fuse_ticks = RANDOM_STREAMS.bombs.randint(3,10) * TICK_RATE      # 3 to 10 seconds, counted in ticks so the fuse does not depend on the frame rate
         self._radius = radius
+        self._has_exploded = False
 
-        self._surf = Surface((self._width, self._height))           #
+        if self._surf is None or self._surf.get_size() != (width, height):
+            self._surf = Surface((self._width, self._height))       #
         self._surf.fill(self.COLOR)                                 #
                                                                     # declare bomb dimensions and coordinates
         self._rect = self._surf.get_rect()                          #
         self._rect.center = center                                  #
         self.rerender()
 
-        self._is_moving_simultaneously = True                       # added an _is_moving_attribute set to True to queue in SimultaneousEvent array
-
     def rerender(self):                                             # method to update display text
+        Bomb.repaints += 1
+        self._rendered_timer_text = self._timer_text()
+        self._notify_repainted()
+        if pygame.display.get_surface() is None:                   # headless: nothing ever draws the surface, so it is left unpainted
+            return
+
         self._surf.fill(self.COLOR)
-        timer_text = BOMB_FONT.render(str(round(self._timer,1)), True, "white")
+        timer_text = render_text(BOMB_FONT, self._rendered_timer_text, "white")
         timer_rect = timer_text.get_rect(center=self._surf.get_rect().center)
         self._surf.blit(timer_text, timer_rect)
 
+    def rerender_if_changed(self):                                  # the timer only shows one decimal, so most ticks leave the text unchanged
+        if self._timer_text() == self._rendered_timer_text:
+            Bomb.skipped_repaints += 1
+        else:
+            self.rerender()
+
+    def _timer_text(self):
+        return str(round(self._fuse_ticks / TICK_RATE, 1))
+
     def on_tick_end(self):                                          # if bomb is dead (health == 0 or timer == 0), explode it, otherwise re-render the display timer text
         if self.is_dead():
             self.on_death()
         else:
-            self.rerender()
+            self.rerender_if_changed()
+
+    def on_tick_start(self):                                        # burns one tick of the fuse at each tick start
+        if self._fuse_ticks > 0:
+            self._fuse_ticks -= 1
 
-    def on_tick_start(self):                                        # updates self._timer at each tick start
-        if self._timer > 0:
-            self._timer = round(self._timer - 0.02, 2)
+    def digest_state(self):
+        return super().digest_state() + (self._fuse_ticks,)
 
     def is_dead(self):                                              # check if the bomb is dead/to be exploded
-        return self._hp == 0 or self._timer == 0
+        return self._hp == 0 or self._fuse_ticks == 0
 
     def on_death(self):                                             # executes explosion animation
+        if self._has_exploded:                                      # a bomb caught in several blasts still only explodes once
+            return
+
+        self._has_exploded = True
         self._damage = 3                                            # change the damage to 3 on explosion
         explosion = self.animation_to_use()
         self.queue_event_at_tail(                                   # queue a BombExplodeEvent with an included Explosion instance
             BombExplodeEvent(entity=self, explosion=explosion))
 
     def animation_to_use(self):                                     # returns an Explosion instance
-        return Explosion(
+        return ENTITY_POOL.acquire(
+            Explosion,
             event_queue=self._event_queue,
             center=self._rect.center
         )
@@ -428,23 +815,29 @@ class Explosion(AbstractGameEntity):                # new Explosion animation cl
     HEIGHT = 200                                    # hardcoded dimensions and
     RADIUS = 100                                    # color based on specifications
     COLOR = "yellow"                                #
+    COLLISION_LAYER = CollisionLayer.EFFECT
 
     def __init__(self, event_queue, center, tick_length=30):            # Explosion animation duration set to be the same as the Damage Text class
         super().__init__(event_queue)
 
-        self._ticks_left = tick_length
-
         self._surf = Surface((self.WIDTH, self.HEIGHT), pygame.SRCALPHA, 32)
-        self._surf = self._surf.convert_alpha()
+        if pygame.display.get_surface() is not None:                    # converting needs a display, which headless games do not have
+            self._surf = self._surf.convert_alpha()
 
         self._circ = pygame.draw.circle(self._surf, self.COLOR, (100,100), self.RADIUS)
+        self.reset(event_queue, center, tick_length)
+
+    def reset(self, event_queue, center, tick_length=30):                # reinitializes a pooled explosion; the drawn circle is reused as is
+        self._reinitialize(event_queue)
+
+        self._ticks_left = tick_length
         self._circ.center = center
 
     def  on_tick_start(self):                                   # decrement animation duration (30 ms) on each tick start
         self._ticks_left -= 1
 
         if self._ticks_left <= 0:                                       # remove the animation at ticks_left <= 0
-            self.queue_event_at_tail(RemoveEntityEvent(entity=self))
+            self.queue_event_at_tail(self.removal_event)
 
     @property
     def surf(self):
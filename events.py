@@ -1,9 +1,12 @@
 from __future__ import annotations
-from collections import defaultdict
+from collections import defaultdict, deque
 from dataclasses import dataclass
+from functools import lru_cache
+from time import perf_counter
 from typing import List, Tuple, TYPE_CHECKING
 
 from abstractions import AbstractGameEntity
+from profiling import EventProfiler
 
 if TYPE_CHECKING:
     from entities import Bullet
@@ -11,9 +14,28 @@ if TYPE_CHECKING:
 
 class EventQueue:
     def __init__(self):
-        self._events = []
-        self._next_tick_events = []
+        self._events = deque()
+        self._next_tick_events = deque()
         self._handlers = defaultdict(list)
+        self._profiler = None
+
+    @property
+    def profiler(self):
+        return self._profiler
+
+    def enable_profiling(self, profiler=None):                     # swaps instrumented methods in on this instance only, so a queue that is
+        self._profiler = profiler or EventProfiler()                # not being profiled runs the plain class methods with no extra checks
+        self.broadcast_event = self._profiled_broadcast_event
+        self.broadcast_queued = self._profiled_broadcast_queued
+        self.queue_event_at_head = self._profiled_queue_event_at_head
+        self.queue_event_at_tail = self._profiled_queue_event_at_tail
+        self.queue_event_on_next_tick = self._profiled_queue_event_on_next_tick
+        return self._profiler
+
+    def disable_profiling(self):
+        for name in ("broadcast_event", "broadcast_queued", "queue_event_at_head", "queue_event_at_tail", "queue_event_on_next_tick"):
+            self.__dict__.pop(name, None)
+        self._profiler = None
 
     def register_handler(self, handler):
         for event_type in handler.event_types:
@@ -23,21 +45,21 @@ class EventQueue:
         for event in events:
             self.queue_event_at_tail(event)
 
-    def queue_event_at_head(self, event):
-        self._events.insert(0, event)
+    def queue_event_at_head(self, event):                          # runs before everything already queued
+        self._events.appendleft(event)
 
-    def queue_event_at_tail(self, event):
+    def queue_event_at_tail(self, event):                          # runs after everything already queued, including events queued while draining
         self._events.append(event)
 
-    def queue_event_on_next_tick(self, event):
+    def queue_event_on_next_tick(self, event):                     # runs on the next drain, in the order queued
         self._next_tick_events.append(event)
 
-    def broadcast_queued(self):
-        while self._events:
-            event = self._events.pop()
-            self.broadcast_event(event)
+    def broadcast_queued(self):                                     # drains first in, first out from the head until the queue is empty
+        events = self._events
+        while events:
+            self.broadcast_event(events.popleft())
 
-        self._events, self._next_tick_events = self._next_tick_events, []
+        self._events, self._next_tick_events = self._next_tick_events, events      # the drained buffer is reused for the tick after next
 
     def broadcast_event(self, event):
         #print(f"Broadcasting {event}")
@@ -51,104 +73,143 @@ class EventQueue:
     def _listeners_for(self, event):
         return self._handlers[type(event)]
 
+    def _profiled_broadcast_event(self, event):
+        profiler = self._profiler
+        profiler.on_event(event)
+        for listener in self._listeners_for(event):
+            start = perf_counter()
+            listener.handle_event(event)
+            profiler.on_handler(listener, perf_counter() - start)
+
+    def _profiled_broadcast_queued(self):                          # broadcast_queued runs once per tick, so it also closes the profiler's tick
+        EventQueue.broadcast_queued(self)
+        self._profiler.end_tick()
+
+    def _profiled_queue_event_at_head(self, event):
+        EventQueue.queue_event_at_head(self, event)
+        self._profiler.on_queue_depth(len(self._events), len(self._next_tick_events))
+
+    def _profiled_queue_event_at_tail(self, event):
+        EventQueue.queue_event_at_tail(self, event)
+        self._profiler.on_queue_depth(len(self._events), len(self._next_tick_events))
+
+    def _profiled_queue_event_on_next_tick(self, event):
+        EventQueue.queue_event_on_next_tick(self, event)
+        self._profiler.on_queue_depth(len(self._events), len(self._next_tick_events))
 
-class GameEvent:
-    pass
 
+class GameEvent:                                # events are immutable and slotted: many are created every tick, and immutable ones can be shared
+    __slots__ = ()
 
-@dataclass
-class KeyHeldEvent(GameEvent):
-    key: str
 
+@dataclass(frozen=True, slots=True)
+class KeyPressedEvent(GameEvent):
+    key: int                                    # pygame keycode
 
-@dataclass
+
+@dataclass(frozen=True, slots=True)
 class KeyReleasedEvent(GameEvent):
-    key: str
+    key: int
+
+
+@lru_cache(maxsize=None)
+def key_pressed_event(key):                     # one shared event per key instead of a new one for every key press
+    return KeyPressedEvent(key=key)
+
 
+@lru_cache(maxsize=None)
+def key_released_event(key):
+    return KeyReleasedEvent(key=key)
 
-@dataclass
+
+@dataclass(frozen=True, slots=True)
 class ControlEvent(GameEvent):
     entity: AbstractGameEntity
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class FireControlEvent(ControlEvent):
     entity: AbstractGameEntity
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class MoveControlEvent(GameEvent):
     entity: AbstractGameEntity
     direction: AbstractGameEntity
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class MoveStopControlEvent(GameEvent):
     entity: AbstractGameEntity
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class FireBulletEvent(GameEvent):
     source: AbstractGameEntity
     bullet: Bullet
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class DropControlEvent(ControlEvent):       # new subclass for the action of dropping bombs
     entity: AbstractGameEntity
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class DropBombEvent(GameEvent):             # new subclass for actually dropping bombs
     source: AbstractGameEntity
     bomb: Bomb
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class BombExplodeEvent(GameEvent):          # new subclass for bomb explosion
     entity: AbstractGameEntity
     explosion: Explosion
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class MoveToEvent(GameEvent):
     entity: AbstractGameEntity
     coords: Tuple[int, int]
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class CollisionEvent(GameEvent):
     collider: AbstractGameEntity
     collided_others: List[AbstractGameEntity]
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
+class CollisionPairsEvent(GameEvent):
+    pairs: List[Tuple[AbstractGameEntity, AbstractGameEntity]]
+
+
+@dataclass(frozen=True, slots=True)
 class DeathEvent(GameEvent):
     entity: AbstractGameEntity
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class AddEntityEvent(GameEvent):
     entity: AbstractGameEntity
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class RemoveEntityEvent(GameEvent):
     entity: AbstractGameEntity
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class SimultaneousMoveEvent(GameEvent):
     entities: List[AbstractGameEntity]
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class DamageEntityEvent(GameEvent):
     attacker: AbstractGameEntity
     defender: AbstractGameEntity
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class DamageResultEvent(GameEvent):
     entity: AbstractGameEntity
     damage: int
@@ -1,8 +1,11 @@
+import argparse
 import random
+import time
+from dataclasses import dataclass
 
 import pygame
 
-from constants import Control
+from constants import Control, TICK_RATE
 from entities import GameEntityManager, Tank, FastFiringTank, BigBulletTank, AlwaysMovingTank, RandomColorTank, Tree, Wall          #imported the four new tank subclasses
 from events import EventQueue
 from handlers import (
@@ -18,7 +21,11 @@ from handlers import (
     MovementEventHandler,
     SimultaneousMoveEvent,
 )
-from utils import get_entity_rects, get_random_coords
+from pools import ENTITY_POOL
+from profiling import EventProfiler
+from rendering import DirtyRectRenderer, FullFrameRenderer, ThreadedRenderer
+from replay import InputRecorder, MatchRecording, replay_match
+from utils import RANDOM_STREAMS, get_entity_rects, get_random_coords
 
 pygame.init()
 
@@ -37,7 +44,7 @@ class TerrainEntityGenerator:
 
         for y in range(0, self._height, Wall.HEIGHT):
             for x in range(0, self._width, Wall.WIDTH):
-                if random.random() < self._wall_chance:
+                if RANDOM_STREAMS.terrain.random() < self._wall_chance:
                     wall = Wall(event_queue, (x, y))
                     if wall.rect.collidelist(invalid_areas) == -1:
                         walls.append(wall)
@@ -45,7 +52,7 @@ class TerrainEntityGenerator:
         return walls
 
     def _create_tree(self, event_queue):
-        return Tree(event_queue, get_random_coords(self._width, self._height))
+        return Tree(event_queue, get_random_coords(self._width, self._height, rng=RANDOM_STREAMS.terrain))
 
     def generate_trees(self, event_queue):
         trees = []
@@ -54,7 +61,7 @@ class TerrainEntityGenerator:
             trees.append(self._create_tree(event_queue))
 
         for _ in range(self._tree_min + 1, self._tree_max + 1):
-            if random.random() < self._tree_chance:
+            if RANDOM_STREAMS.terrain.random() < self._tree_chance:
                 trees.append(self._create_tree(event_queue))
 
         return trees
@@ -69,15 +76,19 @@ class TankGenerator:
 
         return "gray" if player_id not in mapping else mapping[player_id]
 
-    def generate_tanks(self, event_queue, num_tanks, width, height):
+    TANK_TYPES = [FastFiringTank, BigBulletTank, AlwaysMovingTank, RandomColorTank]             # included a list for the new tank subclasses
+
+    def generate_tanks(self, event_queue, num_tanks, width, height, loadout=None):               # loadout: one tank type per player instead of random ones
         tanks = []
-        tank_types = [FastFiringTank, BigBulletTank, AlwaysMovingTank, RandomColorTank]         # included a list for the new tank subclasses
+        tank_types = self.TANK_TYPES
 
         for player_id in range(1, num_tanks + 1):
             while True:
-                make_tank = tank_types[random.randint(0,3)]                                     # randomly chooses a tank subclass from tank_types
+                make_tank = tank_types[RANDOM_STREAMS.tanks.randint(0,3)]                       # randomly chooses a tank subclass from tank_types
+                if loadout:                                                                     # still drawn, so a seed places the tanks in the same
+                    make_tank = loadout[player_id - 1]                                          # spots whatever the loadout
                 coords = get_random_coords(
-                    width // make_tank.WIDTH, height // make_tank.HEIGHT)                       #
+                    width // make_tank.WIDTH, height // make_tank.HEIGHT, rng=RANDOM_STREAMS.tanks)   #
                 coords = (coords[0] * make_tank.WIDTH, coords[1] * make_tank.HEIGHT)            # replaced all instance
                                                                                                 # of 'Tank' with 'make_tank'
                 tank = make_tank(event_queue, player_id, coords,                                #
@@ -89,80 +100,168 @@ class TankGenerator:
         return tanks
 
 
+@dataclass
+class SimulationStats:
+    ticks: int
+    seconds: float
+
+    @property
+    def ticks_per_second(self):
+        return self.ticks / self.seconds if self.seconds > 0 else float("inf")
+
+
 class GameSequence:
+    MAX_TICKS_PER_FRAME = 5                                         # catch-up bound: after a stall the game falls behind real time instead of freezing
 
-    def __init__(self, display, entity_manager, event_queue, engine_event_mapper):
+    def __init__(self, display, entity_manager, event_queue, engine_event_mapper, renderer=None):
         self._entity_manager = entity_manager
         self._event_queue = event_queue
         self._display = display
-        self._engine_event_mapper = engine_event_mapper
+        self._engine_event_mapper = engine_event_mapper             # anything with poll_events(); None when a headless game has no input
+        self._renderer = renderer
+        if self._renderer is None and display is not None:
+            self._renderer = FullFrameRenderer(display, entity_manager)
+
+    @property
+    def is_headless(self):
+        return self._renderer is None
+
+    @property
+    def event_queue(self):
+        return self._event_queue
+
+    @property
+    def entity_manager(self):
+        return self._entity_manager
+
+    def start_game(self, fps=60, tick_rate=TICK_RATE):             # fps only caps how often frames are drawn (0: uncapped); ticks run at tick_rate
+        if self.is_headless:
+            raise RuntimeError("a headless game has no display; use run_headless instead")
 
-    def start_game(self, fps=60):
         clock = pygame.time.Clock()
+        tick_seconds = 1 / tick_rate
+        lag = 0.0                                                   # real time not yet simulated
+        previous = time.perf_counter()
+
+        try:
+            while not self._engine_event_mapper.quit_requested:
+                now = time.perf_counter()
+                lag += now - previous
+                previous = now
+
+                ticks = 0
+                while lag >= tick_seconds and ticks < self.MAX_TICKS_PER_FRAME:
+                    self._run_tick()
+                    lag -= tick_seconds
+                    ticks += 1
+
+                if lag >= tick_seconds:                             # what could not be caught up is dropped, not carried into the next frames
+                    lag %= tick_seconds
+
+                self._renderer.render(lag / tick_seconds)
+
+                clock.tick(fps)
+        finally:
+            self._renderer.close()
+
+    def run_headless(self, num_ticks=None, until=None):             # runs ticks back to back without rendering or frame capping, and stops early once until() is true
+        ticks = 0
+        start = time.perf_counter()
+
+        try:
+            while num_ticks is None or ticks < num_ticks:
+                self._run_tick()
+                ticks += 1
+                if until is not None and until():
+                    break
+        except KeyboardInterrupt:                                   # an unbounded run is stopped with Ctrl+C and still reports its throughput
+            pass
 
-        while True:
-            self._entity_manager.notify_tick_start()
+        return SimulationStats(ticks=ticks, seconds=time.perf_counter() - start)
 
-            self._broadcast_input_events()
-            self._broadcast_simultaneous_movement()
-            self._event_queue.broadcast_queued()
+    def _run_tick(self):
+        self._broadcast_input_events()                              # input only updates control states; tanks act on them in on_tick_start
+        self._entity_manager.notify_tick_start()
 
-            self._entity_manager.notify_tick_end()
+        self._broadcast_simultaneous_movement()
+        self._event_queue.broadcast_queued()
 
-            self._display.fill("black")
-            self._entity_manager.refresh_display()
-            pygame.display.flip()
+        self._entity_manager.notify_tick_end()
 
-            clock.tick(fps)
+        for entity in self._entity_manager.remove_scheduled():                      # duplicate removals of the same entity only release it once
+            ENTITY_POOL.release(entity)
+        ENTITY_POOL.recycle_released()
+
+    def state_digest(self):
+        return self._entity_manager.state_digest()
 
     def _convert_pending_input_events(self):
-        events = [event for event in pygame.event.get()]
-        return self._engine_event_mapper.convert_events(events)
+        return self._engine_event_mapper.poll_events()
 
     def _broadcast_input_events(self):
+        if self._engine_event_mapper is None:
+            return
+
         input_events = self._convert_pending_input_events()
         self._event_queue.broadcast_events(input_events)
 
     def _broadcast_simultaneous_movement(self):
-        event = SimultaneousMoveEvent(
-            entities=self._entity_manager.get_entities(
-                lambda entity: entity.is_moving_simultaneously),
-        )
+        entities = self._entity_manager.get_moving_entities()
+        self._entity_manager.remember_positions(entities)
+        event = SimultaneousMoveEvent(entities=entities)
         self._event_queue.broadcast_event(event)
 
 
 class GameInitializer:
 
-    def initialize_game(self, width=1000, height=800, num_tanks=2, wall_chance=0.3, tree_min=1, tree_max=10, tree_chance=0.5):
-        display = pygame.display.set_mode((width, height))
+    def initialize_game(self, width=1000, height=800, num_tanks=2, wall_chance=0.3, tree_min=1, tree_max=10, tree_chance=0.5, dirty_rects=False, threaded_render=False, headless=False, seed=None, input_source=None, loadout=None, verbose=True):
+        log = print if verbose else lambda message: None
+
+        if loadout is not None and len(loadout) != num_tanks:
+            raise ValueError(f"loadout must name one tank type per player: got {len(loadout)} for {num_tanks} tanks")
+
+        if seed is None:
+            seed = random.randrange(2 ** 32)
+        RANDOM_STREAMS.reseed(seed)                                         # every match is seeded, so any of them can be recorded and replayed
+
+        display = None if headless else pygame.display.set_mode((width, height))
 
         event_queue = EventQueue()
         entity_manager = GameEntityManager(display)
 
-        print("Generating terrain...")
+        log("Generating terrain...")
         terrain_generator = TerrainEntityGenerator(
             width, height, wall_chance, tree_min, tree_max, tree_chance)
         trees = terrain_generator.generate_trees(event_queue)
         walls = terrain_generator.generate_walls(
             event_queue, get_entity_rects(trees))
 
-        print("Generating tanks...")
-        tanks = TankGenerator().generate_tanks(event_queue, num_tanks, width, height)
+        log("Generating tanks...")
+        tanks = TankGenerator().generate_tanks(event_queue, num_tanks, width, height, loadout)
 
         self._remove_walls_under_tanks(walls, tanks)
 
-        print("Registering entities...")
+        log("Registering entities...")
         entity_manager.register_entities(walls)
         entity_manager.register_entities(tanks)
         entity_manager.register_entities(trees)
 
-        print("Registering handlers...")
+        log("Registering handlers...")
         self._register_default_handlers(
             event_queue, entity_manager, width, height)
 
-        engine_event_mapper = EngineEventMapper()
+        if headless:
+            return GameSequence(None, entity_manager, event_queue, input_source)
 
-        return GameSequence(display, entity_manager, event_queue, engine_event_mapper)
+        engine_event_mapper = input_source or EngineEventMapper(self.get_bound_keys())
+
+        if threaded_render:
+            renderer_type = ThreadedRenderer
+        else:
+            renderer_type = DirtyRectRenderer if dirty_rects else FullFrameRenderer
+        renderer = renderer_type(display, entity_manager)
+
+        return GameSequence(display, entity_manager, event_queue, engine_event_mapper, renderer)
 
     def _get_default_handlers(self, event_queue, entity_manager, width, height):
         return [
@@ -173,7 +272,7 @@ class GameInitializer:
             InteractionEventHandler(event_queue),
             FireBulletHandler(event_queue),
             DropBombHandler(event_queue),                                           #added a handler for dropping bombs
-            BombExplodeHandler(event_queue),                                        #added a handler for exploding bombs
+            BombExplodeHandler(event_queue, entity_manager),                        #added a handler for exploding bombs
             EntityLifetimeEventHandler(event_queue, entity_manager),
             DamageEventHandler(event_queue),
         ]
@@ -198,10 +297,11 @@ class GameInitializer:
             },
         }
 
+    def get_bound_keys(self):                                                   # keycodes of every key in the keymap; the only ones input polling has to look at
+        return [pygame.key.key_code(key) for mapping in self._get_default_keymap().values() for key in mapping.values()]
+
     def _setup_key_to_entity_control_handler(self, event_queue, entity_manager):
-        tank_list = entity_manager.get_entities(
-            lambda entity: isinstance(entity, Tank))
-        tank_dict = {tank.player_id: tank for tank in tank_list}
+        tank_dict = {tank.player_id: tank for tank in entity_manager.get_entities_of_type(Tank)}
 
         handler = KeyToEntityControlHandler(event_queue)
         handler.map_keys(tank_dict, self._get_default_keymap())
@@ -219,8 +319,47 @@ class GameInitializer:
 
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--headless", action="store_true", help="simulate without a window, as fast as possible")
+    parser.add_argument("--ticks", type=int, default=None, help="number of ticks to simulate in headless mode (default: until interrupted)")
+    render_mode = parser.add_mutually_exclusive_group()
+    render_mode.add_argument("--dirty-rects", action="store_true", help="only redraw the parts of the screen that changed")
+    render_mode.add_argument("--threaded-render", action="store_true", help="draw frames on a separate thread while the next ticks run")
+    parser.add_argument("--fps", type=int, default=60, help=f"cap on frames drawn per second, 0 for uncapped; the game itself always runs at {TICK_RATE} ticks per second")
+    parser.add_argument("--profile-events", type=int, metavar="TICKS", help="time every event handler and print a report every TICKS ticks")
+    parser.add_argument("--seed", type=int, default=None, help="seed for terrain, tanks, bombs and colors (default: random)")
+    parser.add_argument("--record", metavar="PATH", help="record the match's input to PATH when the window is closed")
+    parser.add_argument("--replay", metavar="PATH", help="replay a recorded match headless at full speed and check that it matches")
+    args = parser.parse_args()
+
+    if args.replay:
+        print("Replaying match...")
+        stats, matches = replay_match(MatchRecording.load(args.replay))
+        print(f"Replayed {stats.ticks} ticks in {stats.seconds:.2f}s ({stats.ticks_per_second:.0f} ticks/s)")
+        print("Replay matches the recording" if matches else "Replay DIVERGED from the recording")
+        raise SystemExit(0 if matches else 1)
+
+    seed = args.seed if args.seed is not None else random.randrange(2 ** 32)
+    recording = None
+    input_source = None
+    if args.record and not args.headless:
+        recording = MatchRecording(seed=seed)
+        input_source = InputRecorder(EngineEventMapper(GameInitializer().get_bound_keys()), recording)
+
     print("Initializing game...")
-    game = GameInitializer().initialize_game()
+    game = GameInitializer().initialize_game(
+        dirty_rects=args.dirty_rects, threaded_render=args.threaded_render, headless=args.headless, seed=seed, input_source=input_source)
+    if args.profile_events:
+        game.event_queue.enable_profiling(EventProfiler(report_every=args.profile_events))
 
     print("Starting game...")
-    game.start_game()
+    if args.headless:
+        stats = game.run_headless(args.ticks)
+        print(f"Simulated {stats.ticks} ticks in {stats.seconds:.2f}s ({stats.ticks_per_second:.0f} ticks/s)")
+    else:
+        game.start_game(fps=args.fps)
+
+    if recording is not None:
+        recording.digest = game.state_digest()
+        recording.save(args.record)
+        print(f"Recorded {recording.ticks} ticks (seed {seed}) to {args.record}")
@@ -9,11 +9,12 @@ from abstractions import (
     IControllable,
     IEventHandler,
 )
-from constants import Control, Direction
-from entities import Bullet, DamageText, Tank, Wall, Bomb, Explosion          # added Bomb and Explosion entity
+from controls import ControlState
+from entities import Bullet, DamageText, Tank, Wall, Bomb
 from events import (
     AddEntityEvent,
     CollisionEvent,
+    CollisionPairsEvent,
     DamageEntityEvent,
     DamageResultEvent,
     FireBulletEvent,
@@ -21,18 +22,29 @@ from events import (
     DropControlEvent,   #
     DropBombEvent,      # imported new event handlers for bomb dropping and explosion
     BombExplodeEvent,   #
-    KeyHeldEvent,
+    KeyPressedEvent,
     KeyReleasedEvent,
     MoveControlEvent,
     MoveStopControlEvent,
     MoveToEvent,
     RemoveEntityEvent,
     SimultaneousMoveEvent,
+    key_pressed_event,
+    key_released_event,
 )
+from pools import ENTITY_POOL
 from utils import get_entity_rects
 
 
-class EngineEventMapper:
+class EngineEventMapper:                                            # emits a key event only when a key goes down or up; key events carry pygame keycodes
+
+    def __init__(self, bound_keys=None):
+        self.quit_requested = False
+        self._bound_keys = tuple(bound_keys) if bound_keys is not None else tuple(self.supported_keys())       # computed once, only the bound keys are scanned each frame
+        self._down_keys = set()
+
+    def poll_events(self):
+        return self.convert_events(pygame.event.get())
 
     def supported_keys(self):
         return list(range(32, 128)) + [
@@ -42,19 +54,33 @@ class EngineEventMapper:
             pygame.locals.K_RIGHT,
         ]
 
-    def convert_events(self, events):
-        ret = []
+    @property
+    def bound_keys(self):
+        return self._bound_keys
 
+    def convert_events(self, events):
         for event in events:
-            if event.type == pygame.locals.KEYUP:
-                ret.append(KeyReleasedEvent(key=pygame.key.name(event.key)))
+            if event.type == pygame.locals.QUIT:
+                self.quit_requested = True
 
         press_data = pygame.key.get_pressed()
-        pressed_keys = [pygame.key.name(code)
-                        for code in self.supported_keys() if press_data[code]]
+        return self.key_transitions({code for code in self._bound_keys if press_data[code]})
+
+    def key_transitions(self, down_keys):                           # events for the bound keys that went up or down since the previous call
+        released_keys = [code for code in self._bound_keys if code in self._down_keys and code not in down_keys]
+        pressed_keys = [code for code in self._bound_keys if code in down_keys and code not in self._down_keys]
+        self._down_keys = down_keys
+
+        return self.key_events(released_keys, pressed_keys)
+
+    def key_events(self, released_keys, pressed_keys):
+        ret = []
+
+        for key in released_keys:
+            ret.append(key_released_event(key))
 
         for key in pressed_keys:
-            ret.append(KeyHeldEvent(key=key))
+            ret.append(key_pressed_event(key))
 
         return ret
 
@@ -66,6 +92,7 @@ class MovementEventHandler(IEventHandler):
         self._entity_manager = entity_manager
         self._width = width
         self._height = height
+        self._screen_rect = pygame.Rect(0, 0, width, height)
 
     @property
     def event_types(self):
@@ -78,9 +105,10 @@ class MovementEventHandler(IEventHandler):
 
             for entity in event.entities:
                 self._move_entity_simultaneous(entity)
+            self._move_projectiles()
 
             self._undo_colliding_tank_movements(event.entities, old_positions)
-            self._emit_collisions_for_entities(event.entities)
+            self._emit_collision_pairs(event.entities)
 
         elif isinstance(event, MoveToEvent):
             self._move_entity_to(event.entity, event.coords)
@@ -99,7 +127,7 @@ class MovementEventHandler(IEventHandler):
 
                 for collided_entity in collided_entities:
                     if isinstance(collided_entity, Wall) or isinstance(collided_entity, Tank):
-                        tank.rect.topleft = old_positions[id(tank)]
+                        tank.move_to(old_positions[id(tank)])
                         undone_tanks.add(tank)
                         break
 
@@ -114,31 +142,22 @@ class MovementEventHandler(IEventHandler):
             entity.move_by_current_facing()
             self._limit_movement_within_screen(entity)
 
-        elif isinstance(entity, Bullet):
-            entity.move_by_current_facing()
-            self._delete_fully_outside_screen(entity)
+    def _move_projectiles(self):
+        projectiles = self._entity_manager.projectiles
+        projectiles.advance()
 
-    def _delete_fully_outside_screen(self, entity):
-        if entity.is_fully_outside_screen(self._width, self._height):
-            self._event_queue.queue_event_at_tail(
-                RemoveEntityEvent(entity=entity))
+        for bullet in projectiles.get_fully_outside(self._width, self._height):
+            self._event_queue.queue_event_at_tail(bullet.removal_event)
 
     def _limit_movement_within_screen(self, entity):
-        if entity.rect.left < 0:
-            entity.rect.left = 0
-        if entity.rect.top < 0:
-            entity.rect.top = 0
-        if entity.rect.right > self._width:
-            entity.rect.right = self._width
-        if entity.rect.bottom > self._height:
-            entity.rect.bottom = self._height
+        clamped = entity.rect.clamp(self._screen_rect)
+        if clamped.topleft != entity.rect.topleft:
+            entity.move_to(clamped.topleft)
 
     def _move_entity_to(self, entity, coords):
         if isinstance(entity, Tank):
             entity.move_to(coords)
             self._limit_movement_within_screen(entity)
-        elif isinstance(entity, Bullet):
-            entity.move_to(coords)
 
     def _emit_collisions_for_entity(self, collider):
         collided_with = self._entity_manager.get_collided_with(collider)
@@ -153,8 +172,13 @@ class MovementEventHandler(IEventHandler):
         for collider in colliders:
             self._emit_collisions_for_entity(collider)
 
+    def _emit_collision_pairs(self, colliders):
+        pairs = self._entity_manager.get_colliding_pairs(colliders)
+        if pairs:
+            self._event_queue.broadcast_event(CollisionPairsEvent(pairs=pairs))
 
-class KeyToEntityControlHandler(IEventHandler):
+
+class KeyToEntityControlHandler(IEventHandler):                    # records key transitions in each player's ControlState; the entity polls it once per tick
 
     def __init__(self, event_queue):
         self._event_queue = event_queue
@@ -162,59 +186,34 @@ class KeyToEntityControlHandler(IEventHandler):
 
     @property
     def event_types(self):
-        return [KeyHeldEvent, KeyReleasedEvent]
+        return [KeyPressedEvent, KeyReleasedEvent]
 
     def map_keys(self, entity_dict, keymap):
         for player_id, mapping in keymap.items():
             entity = entity_dict[player_id]
 
             for control, key in mapping.items():
-                control_to_direction = {
-                    Control.MOVE_UP: Direction.UP,
-                    Control.MOVE_DOWN: Direction.DOWN,
-                    Control.MOVE_LEFT: Direction.LEFT,
-                    Control.MOVE_RIGHT: Direction.RIGHT,
-                }
-
-                if control in control_to_direction:
-                    self.map_key(entity, key, MoveControlEvent,
-                                 direction=control_to_direction[control])
-
-                elif control == Control.FIRE_BULLET:
-                    self.map_key(entity, key, FireControlEvent)
-
-                elif control == Control.DROP_BOMB:                  # added an if statement to accomodate the key_mapping for drop bomb event
-                    self.map_key(entity, key, DropControlEvent)
+                self.map_key(entity, key, control)
 
-    def map_key(self, entity, key, control_event_type, **kwargs):
-        event = None
+    def map_key(self, entity, key, control):                        # key is a key name as in the keymap, or a pygame keycode
+        if isinstance(key, str):
+            key = pygame.key.key_code(key)
 
-        if control_event_type == MoveControlEvent:
-            event = MoveControlEvent(
-                entity=entity, direction=kwargs["direction"])
-        elif control_event_type == FireControlEvent:
-            event = FireControlEvent(entity=entity)
+        if entity.control_state is None:
+            entity.control_state = ControlState()
 
-        elif control_event_type == DropControlEvent:                # added an if statement to accomodate the key_mapping for drop bomb event
-            event = DropControlEvent(entity=entity)
-
-        if event:
-            self._mapping[key] = event
+        self._mapping[key] = (entity.control_state, control)
 
     def handle_event(self, event):
-        if isinstance(event, KeyHeldEvent):
-            if event.key in self._mapping:
-                mapped_event = self._mapping[event.key]
-                self._event_queue.broadcast_event(mapped_event)
+        if event.key not in self._mapping:
+            return
 
-        elif isinstance(event, KeyReleasedEvent):
-            if event.key in self._mapping:
-                mapped_event = self._mapping[event.key]
+        control_state, control = self._mapping[event.key]
 
-                if isinstance(mapped_event, MoveControlEvent):
-                    entity = mapped_event.entity
-                    self._event_queue.broadcast_event(
-                        MoveStopControlEvent(entity=entity))
+        if isinstance(event, KeyPressedEvent):
+            control_state.press(control)
+        elif isinstance(event, KeyReleasedEvent):
+            control_state.release(control)
 
 
 class ControlEventHandler(IEventHandler):
@@ -242,78 +241,96 @@ class ControlEventHandler(IEventHandler):
 
 
 class InteractionEventHandler(IEventHandler):
+    CONTACT_RESPONSES = {                                                           # (collider type, collided type) -> response; subclasses use the pair
+        (Bullet, Bullet): "_bullet_hits_bullet",                                    # of their nearest declared ancestors. A response returns whether
+        (Bullet, Wall): "_bullet_hits_target",                                      # the collider is used up and has to be removed.
+        (Bullet, Tank): "_bullet_hits_tank",
+        (Bullet, Bomb): "_bullet_hits_target",                                      # bullets damage bombs too
+    }
+    BLAST_RESPONSES = {                                                             # only resolved for the CollisionEvent a detonating bomb broadcasts:
+        (Bomb, Bomb): "_blast_hits_target",                                         # contact pairs never see them, so a tank driving over a bomb
+        (Bomb, Wall): "_blast_hits_target",                                         # only takes the blast's damage, once
+        (Bomb, Tank): "_blast_hits_target",
+    }
 
     def __init__(self, event_queue):
         self._event_queue = event_queue
+        self._response_tables = {
+            CollisionEvent: {**self.CONTACT_RESPONSES, **self.BLAST_RESPONSES},
+            CollisionPairsEvent: self.CONTACT_RESPONSES,
+        }
+        self._resolved_responses = {}
 
     @property
     def event_types(self):
-        return [CollisionEvent]
+        return [CollisionEvent, CollisionPairsEvent]
 
     def handle_event(self, event):
         if isinstance(event, CollisionEvent):
-            self._handle_collision(event.collider, event.collided_others)
+            self._handle_collision(CollisionEvent, event.collider, event.collided_others)
 
-    def _handle_collision(self, collider, collided_others):
-        if isinstance(collider, Bullet):
-            self._handle_bullet_collider(collider, collided_others)
+        elif isinstance(event, CollisionPairsEvent):
+            for first, second in event.pairs:
+                self._handle_collision_pair(first, second)
 
-        if isinstance(collider, Bomb):                                              # differentiate bomb collision from bullet collision
-            self._handle_bomb_collider(collider, collided_others)
+    def _handle_collision_pair(self, first, second):                               # contact pairs are unordered: the first side with a response is the collider
+        if self._response_for(CollisionPairsEvent, type(first), type(second)) is not None:
+            self._handle_collision(CollisionPairsEvent, first, (second,))
+        else:
+            self._handle_collision(CollisionPairsEvent, second, (first,))
 
-    def _handle_bullet_collider(self, collider, collided_others):
-        walls = self._get_entities_with_type(collided_others, Wall)
-        tanks = self._get_entities_with_type(collided_others, Tank)
-        bombs = self._get_entities_with_type(collided_others, Bomb)                 # added a bomb list for bullet-bomb collision
-        if collider.owner in tanks:
-            tanks.remove(collider.owner)
-        other_bullets = self._get_entities_with_type(collided_others, Bullet)
+    def _handle_collision(self, event_type, collider, collided_others):            # one pass, each collided entity goes straight to its response
+        used_up = False
 
-        for other_bullet in other_bullets:
-            self._queue_entity_removal(other_bullet)
+        for collided in collided_others:
+            response = self._response_for(event_type, type(collider), type(collided))
+            if response is not None and response(collider, collided):
+                used_up = True
 
-        for wall in walls:
-            self._queue_entity_damaging(collider, wall)
+        if used_up:
+            self._queue_entity_removal(collider)
 
-        for tank in tanks:
-            self._queue_entity_damaging(collider, tank)
+    def _response_for(self, event_type, collider_type, collided_type):             # resolved through both MROs once per event and type pair, then cached
+        key = (event_type, collider_type, collided_type)
+        if key not in self._resolved_responses:
+            self._resolved_responses[key] = self._resolve_response(self._response_tables[event_type], collider_type, collided_type)
 
-        for bomb in bombs:                                                          # added to damage bombs collided with
-            self._queue_entity_damaging(collider, bomb)
+        return self._resolved_responses[key]
 
-        if walls or tanks or other_bullets or bombs:                                # included the bombs list in removing bullet entity
-            self._queue_entity_removal(collider)
+    def _resolve_response(self, responses, collider_type, collided_type):
+        for collider_base in collider_type.__mro__:
+            for collided_base in collided_type.__mro__:
+                name = responses.get((collider_base, collided_base))
+                if name is not None:
+                    return getattr(self, name)
 
-    def _handle_bomb_collider(self, collider, collided_others):                     # handler to accomodate collision caused by bombs/explosions
-        walls = self._get_entities_with_type(collided_others, Wall)                 #
-        tanks = self._get_entities_with_type(collided_others, Tank)                 # separate entity collisions by entity type
-        other_bombs = self._get_entities_with_type(collided_others, Bomb)           #
+        return None
 
-        for other_bomb in other_bombs:
-            self._queue_entity_damaging(collider, other_bomb)
+    def _bullet_hits_bullet(self, bullet, other_bullet):                           # bullets cancel each other out
+        self._queue_entity_removal(other_bullet)
+        return True
 
-        for wall in walls:                                                          # damage entities on each entity list
-            self._queue_entity_damaging(collider, wall)
+    def _bullet_hits_target(self, bullet, target):
+        self._queue_entity_damaging(bullet, target)
+        return True
 
-        for tank in tanks:
-            self._queue_entity_damaging(collider, tank)
+    def _bullet_hits_tank(self, bullet, tank):
+        if tank is bullet.owner:                                                    # a tank's own bullets pass through it
+            return False
+
+        return self._bullet_hits_target(bullet, tank)
+
+    def _blast_hits_target(self, bomb, target):
+        self._queue_entity_damaging(bomb, target)
+        return False
 
     def _queue_entity_removal(self, entity):
-        self._event_queue.queue_event_at_tail(RemoveEntityEvent(entity=entity))
+        self._event_queue.queue_event_at_tail(entity.removal_event)
 
     def _queue_entity_damaging(self, attacker, defender):
         self._event_queue.queue_event_at_tail(
             DamageEntityEvent(attacker=attacker, defender=defender))
 
-    def _get_entities_with_type(self, entities, entity_type):
-        ret = []
-
-        for entity in entities:
-            if isinstance(entity, entity_type):
-                ret.append(entity)
-
-        return ret
-
 
 class FireBulletHandler(IEventHandler):
 
@@ -347,8 +364,9 @@ class DropBombHandler(IEventHandler):                   # added a new Handler cl
 
 class BombExplodeHandler(IEventHandler):                # added a new Handler class for exploding bombs
 
-    def __init__(self, event_queue):
+    def __init__(self, event_queue, entity_manager):
         self._event_queue = event_queue
+        self._entity_manager = entity_manager
 
     @property
     def event_types(self):
@@ -356,15 +374,22 @@ class BombExplodeHandler(IEventHandler):                # added a new Handler cl
 
     def handle_event(self, event):
         if isinstance(event, BombExplodeEvent):
-            self._handle_explosion_animation(event.entity)
+            self._handle_blast(event.entity)
+            self._handle_explosion_animation(event.entity, event.explosion)
+
+    def _handle_blast(self, entity):                    # a single area query on detonation finds everything caught in the blast
+        collided_with = self._entity_manager.get_collided_with(entity)
+        if collided_with:
+            self._event_queue.broadcast_event(
+                CollisionEvent(collider=entity, collided_others=collided_with))
 
-    def _handle_explosion_animation(self, entity):
+    def _handle_explosion_animation(self, entity, explosion):
         self._queue_entity_removal(entity)
         self._event_queue.queue_event_at_tail(
-            AddEntityEvent(entity=Explosion(self._event_queue, entity.rect.center)))            # queues an event that adds an Explosion entity to the entity list
+            AddEntityEvent(entity=explosion))                                                   # queues an event that adds the bomb's Explosion entity to the entity list
 
     def _queue_entity_removal(self, entity):
-        self._event_queue.queue_event_at_tail(RemoveEntityEvent(entity=entity))                 # queues an event that removes the entity from the entity list
+        self._event_queue.queue_event_at_tail(entity.removal_event)                 # queues an event that removes the entity from the entity list
 
 
 
@@ -382,7 +407,7 @@ class EntityLifetimeEventHandler(IEventHandler):
         if isinstance(event, AddEntityEvent):
             self._entity_manager.register_entity(event.entity)
         elif isinstance(event, RemoveEntityEvent):
-            self._entity_manager.unregister_entity(event.entity)
+            self._entity_manager.schedule_removal(event.entity)                         # removed and released to the pool together at the end of the tick
 
 
 class DamageEventHandler(IEventHandler):
@@ -404,8 +429,10 @@ class DamageEventHandler(IEventHandler):
 
     def _handle_display_damage(self, entity, damage):                                                   # only display if damage > 0
         if damage > 0:
+            damage_text = ENTITY_POOL.acquire(
+                DamageText, event_queue=self._event_queue, center=entity.rect.center, damage=damage)
             self._event_queue.queue_event_at_tail(
-                AddEntityEvent(entity=DamageText(self._event_queue, entity.rect.center, damage)))
+                AddEntityEvent(entity=damage_text))
 
     def _do_damage(self, attacker, defender, damage):
         if isinstance(defender, DamageableTrait):
@@ -420,4 +447,4 @@ class DamageEventHandler(IEventHandler):
                 self._queue_entity_removal(defender)
 
     def _queue_entity_removal(self, entity):
-        self._event_queue.queue_event_at_tail(RemoveEntityEvent(entity=entity))
+        self._event_queue.queue_event_at_tail(entity.removal_event)
@@ -0,0 +1,51 @@
+class EntityPool:
+    MAX_FREE_PER_TYPE = 256
+
+    def __init__(self, max_free_per_type=MAX_FREE_PER_TYPE):
+        self._max_free_per_type = max_free_per_type
+        self._free = {}
+        self._released = []                                 # entities removed this tick; events queued this tick may still refer to them
+        self._hits = {}
+        self._misses = {}
+
+    def acquire(self, entity_type, **kwargs):
+        free = self._free.setdefault(entity_type, [])
+
+        if free:
+            self._hits[entity_type] = self._hits.get(entity_type, 0) + 1
+            entity = free.pop()
+            entity.reset(**kwargs)
+            return entity
+
+        self._misses[entity_type] = self._misses.get(entity_type, 0) + 1
+        return entity_type(**kwargs)
+
+    def release(self, entity):
+        if type(entity) in self._free:                      # only types that are allocated through the pool are kept
+            self._released.append(entity)
+
+    def recycle_released(self):                             # called once per tick, after every event referring to the released entities has run
+        for entity in self._released:
+            free = self._free[type(entity)]
+            if len(free) < self._max_free_per_type:
+                free.append(entity)
+
+        self._released.clear()
+
+    def stats(self):
+        ret = {}
+
+        for entity_type, free in self._free.items():
+            hits = self._hits.get(entity_type, 0)
+            misses = self._misses.get(entity_type, 0)
+            ret[entity_type.__name__] = {
+                "hits": hits,
+                "misses": misses,
+                "hit_rate": hits / (hits + misses) if hits + misses else 0.0,
+                "free": len(free),
+            }
+
+        return ret
+
+
+ENTITY_POOL = EntityPool()
@@ -0,0 +1,111 @@
+from collections import Counter, defaultdict, deque
+
+
+class EventProfiler:                                                # collects what an EventQueue reports while its profiling is enabled
+    SAMPLES_PER_HANDLER = 1024                                      # percentiles are taken over each handler's most recent calls
+    TICK_HISTORY = 600
+    PERCENTILES = (50, 90, 99)
+
+    def __init__(self, report_every=None, report_callback=print, samples_per_handler=SAMPLES_PER_HANDLER, tick_history=TICK_HISTORY):
+        self._report_every = report_every
+        self._report_callback = report_callback
+        self._samples_per_handler = samples_per_handler
+        self._tick_history = deque(maxlen=tick_history)
+        self.reset()
+
+    def reset(self):
+        self._ticks = 0
+        self._tick_counts = Counter()
+        self._tick_history.clear()
+        self._event_totals = Counter()
+        self._handler_calls = Counter()
+        self._handler_seconds = defaultdict(float)
+        self._handler_max = defaultdict(float)
+        self._handler_samples = defaultdict(lambda: deque(maxlen=self._samples_per_handler))
+        self._queue_high_water = 0
+        self._next_tick_high_water = 0
+
+    @property
+    def ticks(self):
+        return self._ticks
+
+    def on_event(self, event):
+        self._tick_counts[type(event).__name__] += 1
+
+    def on_handler(self, handler, seconds):                         # inclusive: events a handler broadcasts itself are counted in its time too
+        name = type(handler).__name__
+        self._handler_calls[name] += 1
+        self._handler_seconds[name] += seconds
+        self._handler_samples[name].append(seconds)
+        if seconds > self._handler_max[name]:
+            self._handler_max[name] = seconds
+
+    def on_queue_depth(self, depth, next_tick_depth):
+        if depth > self._queue_high_water:
+            self._queue_high_water = depth
+        if next_tick_depth > self._next_tick_high_water:
+            self._next_tick_high_water = next_tick_depth
+
+    def end_tick(self):
+        self._ticks += 1
+        self._event_totals.update(self._tick_counts)
+        self._tick_history.append(self._tick_counts)
+        self._tick_counts = Counter()
+
+        if self._report_every and self._ticks % self._report_every == 0:
+            self._report_callback(self.format_report())
+
+    def event_counts(self):
+        return dict(self._event_totals)
+
+    def event_counts_per_tick(self):                                # one dict per recent tick, oldest first
+        return [dict(counts) for counts in self._tick_history]
+
+    def handler_timings(self):
+        ret = {}
+
+        for name, calls in self._handler_calls.items():
+            samples = sorted(self._handler_samples[name])
+            timing = {
+                "calls": calls,
+                "total": self._handler_seconds[name],
+                "mean": self._handler_seconds[name] / calls,
+                "max": self._handler_max[name],
+            }
+            for percentile in self.PERCENTILES:
+                timing[f"p{percentile}"] = samples[min(len(samples) - 1, len(samples) * percentile // 100)]
+            ret[name] = timing
+
+        return ret
+
+    def queue_high_water(self):
+        return {
+            "current_tick": self._queue_high_water,
+            "next_tick": self._next_tick_high_water,
+        }
+
+    def report(self):
+        return {
+            "ticks": self._ticks,
+            "event_counts": self.event_counts(),
+            "handler_timings": self.handler_timings(),
+            "queue_high_water": self.queue_high_water(),
+        }
+
+    def format_report(self):
+        ticks = max(self._ticks, 1)
+        lines = [f"Event profile after {self._ticks} ticks"]
+
+        for name, count in sorted(self._event_totals.items(), key=lambda item: -item[1]):
+            lines.append(f"  {name:<24} {count:>9} events  {count / ticks:9.2f}/tick")
+
+        timings = self.handler_timings()
+        for name, timing in sorted(timings.items(), key=lambda item: -item[1]["total"]):
+            lines.append(
+                f"  {name:<28} {timing['calls']:>9} calls  total {timing['total'] * 1000:9.2f} ms"
+                f"  p50 {timing['p50'] * 1e6:8.1f} us  p99 {timing['p99'] * 1e6:8.1f} us  max {timing['max'] * 1e6:8.1f} us")
+
+        high_water = self.queue_high_water()
+        lines.append(f"  queue high-water: {high_water['current_tick']} this tick, {high_water['next_tick']} next tick")
+
+        return "\n".join(lines)
@@ -0,0 +1,194 @@
+import numpy as np
+
+from constants import CollisionLayer
+
+
+class ProjectileSystem:
+    INITIAL_CAPACITY = 64
+
+    def __init__(self, capacity=INITIAL_CAPACITY):
+        self._bullets = []                                          # struct-of-arrays: row i of every array belongs to self._bullets[i]
+        self._slots = {}
+        self._positions = np.zeros((capacity, 2), dtype=np.int64)
+        self._previous_positions = np.zeros((capacity, 2), dtype=np.int64)   # positions before the last advance, for drawing between two ticks
+        self._velocities = np.zeros((capacity, 2), dtype=np.int64)
+        self._sizes = np.zeros((capacity, 2), dtype=np.int64)
+        self._owner_ids = np.zeros(capacity, dtype=np.int64)
+
+        self._static_targets = {}                                   # walls never move, so their arrays are only rebuilt when the set changes
+        self._static_cache = None
+        self._dynamic_targets = {}
+        self._frozen_surfaces = {}                                  # copies of bullet surfaces for render snapshots; pooled bullets are refilled on reuse
+
+    def __len__(self):
+        return len(self._bullets)
+
+    def __contains__(self, bullet):
+        return bullet in self._slots
+
+    @property
+    def bullets(self):
+        return self._bullets.copy()
+
+    def add(self, bullet):
+        if bullet in self._slots:
+            return
+
+        slot = len(self._bullets)
+        if slot == len(self._positions):
+            self._grow()
+
+        rect = bullet.rect
+        self._bullets.append(bullet)
+        self._slots[bullet] = slot
+        self._positions[slot] = rect.topleft
+        self._previous_positions[slot] = rect.topleft
+        self._velocities[slot] = bullet.velocity
+        self._sizes[slot] = rect.size
+        self._owner_ids[slot] = id(bullet.owner)
+        bullet.attach(self)
+
+    def remove(self, bullet):
+        if bullet not in self._slots:
+            return False
+
+        bullet.detach()
+        self._frozen_surfaces.pop(bullet, None)
+        slot = self._slots.pop(bullet)
+        last = len(self._bullets) - 1
+
+        if slot != last:                                            # swap-remove keeps the arrays dense
+            moved = self._bullets[last]
+            self._bullets[slot] = moved
+            self._slots[moved] = slot
+            for array in (self._positions, self._previous_positions, self._velocities, self._sizes, self._owner_ids):
+                array[slot] = array[last]
+
+        self._bullets.pop()
+        return True
+
+    def position_of(self, bullet):
+        x, y = self._positions[self._slots[bullet]]
+        return int(x), int(y)
+
+    def move_to(self, bullet, coords):
+        self._positions[self._slots[bullet]] = coords
+
+    def add_target(self, entity):
+        if entity.COLLISION_LAYER & CollisionLayer.WALL:
+            self._static_targets[entity] = None
+            self._static_cache = None
+        else:
+            self._dynamic_targets[entity] = None
+
+    def remove_target(self, entity):
+        if entity in self._static_targets:
+            del self._static_targets[entity]
+            self._static_cache = None
+
+        self._dynamic_targets.pop(entity, None)
+
+    def advance(self):
+        count = len(self._bullets)
+        self._previous_positions[:count] = self._positions[:count]
+        self._positions[:count] += self._velocities[:count]
+
+    def get_fully_outside(self, width, height):
+        bounds = self._bounds()
+        outside = (bounds[:, 2] <= 0) | (bounds[:, 3] <= 0) | (bounds[:, 0] >= width) | (bounds[:, 1] >= height)
+        return [self._bullets[index] for index in np.flatnonzero(outside)]
+
+    def get_colliding_pairs(self):
+        if not self._bullets:
+            return []
+
+        bounds = self._bounds()
+        owner_ids = self._owner_ids[:len(self._bullets)]
+        pairs = []
+
+        if self._static_cache is None:
+            self._static_cache = self._target_arrays(list(self._static_targets))
+
+        pairs.extend(self._pairs_with_targets(bounds, owner_ids, *self._static_cache))
+        pairs.extend(self._pairs_with_targets(bounds, owner_ids, *self._target_arrays(list(self._dynamic_targets))))
+
+        overlaps = np.triu(self._overlaps(bounds, bounds), k=1)    # upper triangle so each bullet pair is reported once
+        for first, second in zip(*np.nonzero(overlaps)):
+            pairs.append((self._bullets[first], self._bullets[second]))
+
+        return pairs
+
+    def frozen_blits(self, alpha=1.0):                              # (surface copy, topleft) for every bullet, for render snapshots
+        surfaces = self._frozen_surfaces
+        blits = []
+
+        for bullet, position in zip(self._bullets, self._drawn_positions(alpha)):
+            surface = surfaces.get(bullet)
+            if surface is None:
+                surface = surfaces[bullet] = bullet.surf.copy()
+            blits.append((surface, position))
+
+        return blits
+
+    def _drawn_positions(self, alpha):                              # topleft of every bullet, alpha of the way along its last step
+        count = len(self._bullets)
+        positions = self._positions[:count]
+        if alpha < 1:
+            previous = self._previous_positions[:count]
+            positions = previous + ((positions - previous) * alpha).astype(np.int64)
+
+        return [tuple(position) for position in positions.tolist()]
+
+    def rects(self):
+        return [bullet.rect.copy() for bullet in self._bullets]
+
+    def draw(self, display, area=None, alpha=1.0):                 # alpha < 1 draws every bullet that far along its last step
+        bullets = self._bullets
+        if area is not None:
+            bullets = [bullet for bullet in bullets if area.colliderect(bullet.rect)]
+
+        if alpha < 1 and area is None:
+            display.blits(list(zip([bullet.surf for bullet in bullets], self._drawn_positions(alpha))), doreturn=False)
+            return
+
+        display.blits([(bullet.surf, bullet.rect) for bullet in bullets], doreturn=False)
+
+    def _pairs_with_targets(self, bounds, owner_ids, targets, target_bounds, target_ids):
+        if not targets:
+            return []
+
+        overlaps = self._overlaps(bounds, target_bounds) & (owner_ids[:, None] != target_ids[None, :])
+        return [(self._bullets[bullet], targets[target]) for bullet, target in zip(*np.nonzero(overlaps))]
+
+    def _target_arrays(self, targets):
+        rects = np.array([tuple(target.rect) for target in targets], dtype=np.int64).reshape(-1, 4)
+        ids = np.array([id(target) for target in targets], dtype=np.int64)
+        return targets, self._to_bounds(rects), ids
+
+    def _bounds(self):
+        count = len(self._bullets)
+        topleft = self._positions[:count]
+        return np.hstack((topleft, topleft + self._sizes[:count]))
+
+    def _grow(self):
+        capacity = len(self._positions) * 2
+        self._positions = self._resized(self._positions, capacity)
+        self._previous_positions = self._resized(self._previous_positions, capacity)
+        self._velocities = self._resized(self._velocities, capacity)
+        self._sizes = self._resized(self._sizes, capacity)
+        self._owner_ids = self._resized(self._owner_ids, capacity)
+
+    @staticmethod
+    def _resized(array, capacity):
+        resized = np.zeros((capacity,) + array.shape[1:], dtype=array.dtype)
+        resized[:len(array)] = array
+        return resized
+
+    @staticmethod
+    def _to_bounds(rects):                                          # (left, top, width, height) -> (left, top, right, bottom)
+        return np.hstack((rects[:, :2], rects[:, :2] + rects[:, 2:]))
+
+    @staticmethod
+    def _overlaps(a, b):                                            # same test as pygame.Rect.colliderect, for every row of a against every row of b
+        return (a[:, None, 0] < b[None, :, 2]) & (b[None, :, 0] < a[:, None, 2]) \
+            & (a[:, None, 1] < b[None, :, 3]) & (b[None, :, 1] < a[:, None, 3])
@@ -0,0 +1,194 @@
+import threading
+from dataclasses import dataclass
+from typing import Tuple
+
+import pygame
+
+BACKGROUND_COLOR = "black"
+
+
+@dataclass(frozen=True, slots=True)
+class RenderSnapshot:                                           # one frame as (surface, topleft) blits in draw order; the surfaces are copies the
+    blits: Tuple[Tuple[pygame.Surface, Tuple[int, int]], ...]   # simulation never draws on again, so it can be drawn from another thread
+
+
+class TerrainLayer:                                             # walls and trees baked into cached surfaces instead of being blitted one by one
+    CANOPY_COLORKEY = (255, 0, 255)
+
+    def __init__(self, display):
+        self._display = display
+
+        self._ground = pygame.Surface(display.get_size(), 0, display)
+        self._ground.fill(BACKGROUND_COLOR)
+        self._ground_entities = {}
+
+        self._canopy = pygame.Surface(display.get_size(), 0, display)
+        self._canopy_entities = {}
+        self._canopy_order = None
+        self._canopy_needs_rebuild = False
+
+        self._ground_snapshot = None                            # copies handed to render snapshots, remade only after the layer changes
+        self._canopy_snapshot = None
+
+    @property
+    def canopy_order(self):                                     # draw order of the lowest canopy entity; anything registered later is drawn above the canopy
+        return self._canopy_order
+
+    def add_ground(self, entity):
+        self._ground_entities[entity] = None
+        self._ground.blit(entity.surf, entity.rect)
+        self._ground_snapshot = None
+
+    def add_canopy(self, entity, draw_order):
+        self._canopy_entities[entity] = draw_order
+        self._canopy_order = min(self._canopy_entities.values())
+        self._canopy_needs_rebuild = True
+
+    def remove(self, entity):
+        if entity in self._ground_entities:
+            del self._ground_entities[entity]
+            self._patch_ground(entity.rect)
+
+        elif entity in self._canopy_entities:
+            del self._canopy_entities[entity]
+            self._canopy_order = min(self._canopy_entities.values(), default=None)
+            self._canopy_needs_rebuild = True
+
+    def draw_ground(self, display, area=None):
+        if area is None:
+            display.blit(self._ground, (0, 0))
+        else:
+            display.blit(self._ground, area, area)
+
+    def draw_canopy(self, display, area=None):
+        if not self._canopy_entities:
+            return
+
+        if self._canopy_needs_rebuild:
+            self._rebuild_canopy()
+
+        if area is None:
+            display.blit(self._canopy, (0, 0))
+        else:
+            display.blit(self._canopy, area, area)
+
+    def ground_snapshot(self):
+        if self._ground_snapshot is None:
+            self._ground_snapshot = self._ground.copy()
+        return self._ground_snapshot
+
+    def canopy_snapshot(self):                                  # None when there are no trees
+        if not self._canopy_entities:
+            return None
+
+        if self._canopy_needs_rebuild:
+            self._rebuild_canopy()
+        if self._canopy_snapshot is None:
+            self._canopy_snapshot = self._canopy.copy()
+        return self._canopy_snapshot
+
+    def _patch_ground(self, area):                              # only the removed tile is repainted
+        self._ground.fill(BACKGROUND_COLOR, area)
+        self._ground.set_clip(area)
+
+        for entity in self._ground_entities:
+            if entity.rect.colliderect(area):
+                self._ground.blit(entity.surf, entity.rect)
+
+        self._ground.set_clip(None)
+        self._ground_snapshot = None
+
+    def _rebuild_canopy(self):
+        self._canopy.set_colorkey(None)
+        self._canopy.fill(self.CANOPY_COLORKEY)
+
+        for entity in self._canopy_entities:
+            self._canopy.blit(entity.surf, entity.rect)
+
+        self._canopy.set_colorkey(self.CANOPY_COLORKEY, pygame.RLEACCEL)     # run-length encoding makes the transparent parts nearly free to blit
+        self._canopy_needs_rebuild = False
+        self._canopy_snapshot = None
+
+
+class FullFrameRenderer:
+
+    def __init__(self, display, entity_manager):
+        self._display = display
+        self._entity_manager = entity_manager
+
+    def render(self, alpha=1.0):                                # alpha: how far real time is between the last two ticks
+        self._entity_manager.refresh_display(alpha)             # the terrain layer covers the whole screen, so no fill is needed
+        pygame.display.flip()
+
+    def close(self):
+        pass
+
+
+class DirtyRectRenderer(FullFrameRenderer):                     # only repaints and pushes the areas that changed since the previous frame
+
+    def __init__(self, display, entity_manager):
+        super().__init__(display, entity_manager)
+        self._screen_rect = display.get_rect()
+        self._needs_full_redraw = True
+        entity_manager.enable_dirty_tracking()
+
+    def render(self, alpha=1.0):                                # always draws the latest tick: frames between two ticks have nothing dirty and cost nothing
+        dirty_rects = self._entity_manager.collect_dirty_rects()
+
+        if self._needs_full_redraw:
+            self._needs_full_redraw = False
+            super().render()
+            return
+
+        dirty_rects = [rect.clip(self._screen_rect) for rect in dirty_rects]
+        dirty_rects = [rect for rect in dirty_rects if rect.width and rect.height]
+
+        for rect in dirty_rects:
+            self._display.set_clip(rect)
+            self._entity_manager.refresh_display_area(rect)
+
+        self._display.set_clip(None)
+        pygame.display.update(dirty_rects)
+
+
+class ThreadedRenderer:                                         # the simulation publishes a snapshot per frame and a render thread draws the newest one and
+                                                                # flips, so drawing overlaps the next ticks instead of adding to them
+    def __init__(self, display, entity_manager):
+        self._display = display
+        self._entity_manager = entity_manager
+        self._snapshot = None                                   # the published frame; a newer one replaces it whether or not it was drawn
+        self._drawn_snapshot = None
+        self._condition = threading.Condition()
+        self._running = True
+        self.frames_published = 0
+        self.frames_drawn = 0
+
+        self._thread = threading.Thread(target=self._render_loop, name="renderer", daemon=True)
+        self._thread.start()
+
+    def render(self, alpha=1.0):                                # runs on the simulation thread; never waits for the display
+        snapshot = self._entity_manager.snapshot(alpha)
+
+        with self._condition:
+            self._snapshot = snapshot
+            self.frames_published += 1
+            self._condition.notify()
+
+    def close(self):                                            # lets the frame being drawn finish, then stops the thread
+        with self._condition:
+            self._running = False
+            self._condition.notify()
+
+        self._thread.join()
+
+    def _render_loop(self):
+        while True:
+            with self._condition:
+                self._condition.wait_for(lambda: self._snapshot is not self._drawn_snapshot or not self._running)
+                if not self._running:
+                    return
+                snapshot = self._drawn_snapshot = self._snapshot
+
+            self._display.blits(snapshot.blits, doreturn=False)
+            pygame.display.flip()
+            self.frames_drawn += 1
@@ -0,0 +1,77 @@
+import json
+from dataclasses import asdict, dataclass, field
+from typing import Optional
+
+from events import KeyPressedEvent, KeyReleasedEvent, key_pressed_event, key_released_event
+
+
+@dataclass
+class MatchRecording:
+    seed: int
+    settings: dict = field(default_factory=dict)                    # extra keyword arguments for GameInitializer.initialize_game
+    ticks: int = 0
+    inputs: list = field(default_factory=list)                      # [tick, pressed keycodes, released keycodes] for every tick on which a key went down or up
+    digest: Optional[str] = None                                    # GameSequence.state_digest() at the end of the match
+
+    def save(self, path):
+        with open(path, "w") as file:
+            json.dump(asdict(self), file, separators=(",", ":"))
+
+    @classmethod
+    def load(cls, path):
+        with open(path) as file:
+            return cls(**json.load(file))
+
+
+class InputRecorder:                                                # wraps the live input mapper and records what it produced on every tick
+
+    def __init__(self, engine_event_mapper, recording):
+        self._engine_event_mapper = engine_event_mapper
+        self._recording = recording
+
+    @property
+    def quit_requested(self):
+        return self._engine_event_mapper.quit_requested
+
+    def poll_events(self):
+        events = self._engine_event_mapper.poll_events()
+
+        if events:                                                  # key events only mark transitions, so most ticks have nothing to store
+            self._recording.inputs.append([
+                self._recording.ticks,
+                [event.key for event in events if isinstance(event, KeyPressedEvent)],
+                [event.key for event in events if isinstance(event, KeyReleasedEvent)],
+            ])
+
+        self._recording.ticks += 1
+        return events
+
+
+class InputReplayer:                                                # plays a recording back in place of the live input mapper
+    quit_requested = False
+
+    def __init__(self, recording):
+        self._inputs = recording.inputs
+        self._next_input = 0
+        self._tick = 0
+
+    def poll_events(self):
+        events = []
+
+        if self._next_input < len(self._inputs) and self._inputs[self._next_input][0] == self._tick:
+            _, pressed, released = self._inputs[self._next_input]
+            events = [key_released_event(key) for key in released] + [key_pressed_event(key) for key in pressed]     # same order as EngineEventMapper
+            self._next_input += 1
+
+        self._tick += 1
+        return events
+
+
+def replay_match(recording):                                        # replays headless at full speed; returns the run's stats and whether it reproduced the recording
+    from game import GameInitializer
+
+    game = GameInitializer().initialize_game(
+        headless=True, seed=recording.seed, input_source=InputReplayer(recording), **recording.settings)
+    stats = game.run_headless(recording.ticks)
+
+    return stats, game.state_digest() == recording.digest
@@ -0,0 +1,87 @@
+from collections import defaultdict
+
+from constants import CollisionLayer
+
+
+class SpatialGrid:
+    CELL_SIZE = 64
+
+    def __init__(self, cell_size=CELL_SIZE):
+        self._cell_size = cell_size
+        self._cells = defaultdict(dict)                 # dicts used as insertion-ordered sets so queries are deterministic
+        self._entity_cells = {}
+
+    def __contains__(self, entity):
+        return entity in self._entity_cells
+
+    def __len__(self):
+        return len(self._entity_cells)
+
+    def insert(self, entity):
+        cell_range = self._cell_range(entity.rect)
+        self._entity_cells[entity] = cell_range
+
+        for cell in self._cells_in(cell_range):
+            self._cells[cell][entity] = None
+
+    def remove(self, entity):
+        cell_range = self._entity_cells.pop(entity, None)
+        if cell_range is None:
+            return
+
+        for cell in self._cells_in(cell_range):
+            bucket = self._cells[cell]
+            del bucket[entity]
+            if not bucket:
+                del self._cells[cell]
+
+    def update(self, entity):
+        old_range = self._entity_cells.get(entity)
+        if old_range is None or old_range == self._cell_range(entity.rect):
+            return
+
+        self.remove(entity)
+        self.insert(entity)
+
+    def query(self, rect):
+        found = {}
+
+        for cell in self._cells_in(self._cell_range(rect)):
+            bucket = self._cells.get(cell)
+            if bucket:
+                found.update(bucket)
+
+        return list(found)
+
+    def _cell_range(self, rect):
+        size = self._cell_size
+        return (
+            rect.left // size,
+            rect.top // size,
+            max(rect.left, rect.right - 1) // size,
+            max(rect.top, rect.bottom - 1) // size,
+        )
+
+    def _cells_in(self, cell_range):
+        left, top, right, bottom = cell_range
+        for cell_y in range(top, bottom + 1):
+            for cell_x in range(left, right + 1):
+                yield (cell_x, cell_y)
+
+
+def sweep_and_prune(entities):
+    ordered = sorted(entities, key=lambda entity: entity.rect.left)    # sort once along x, then only test entities whose x-extents still overlap
+    active = []
+    pairs = []
+
+    for entity in ordered:
+        rect = entity.rect
+        active = [other for other in active if other.rect.right > rect.left]
+
+        for other in active:
+            if CollisionLayer.can_collide(entity, other) and rect.colliderect(other.rect):
+                pairs.append((other, entity))
+
+        active.append(entity)
+
+    return pairs
@@ -0,0 +1,127 @@
+from dataclasses import dataclass
+
+import pytest
+
+from abstractions import IEventHandler
+from events import EventQueue, GameEvent
+from profiling import EventProfiler
+
+
+@dataclass(frozen=True, slots=True)
+class MarkerEvent(GameEvent):
+    name: str
+
+
+class RecordingHandler(IEventHandler):                              # records the order events arrive in, and runs a follow-up action for some of them
+
+    def __init__(self, follow_ups=None):
+        self.seen = []
+        self._follow_ups = follow_ups or {}
+
+    @property
+    def event_types(self):
+        return [MarkerEvent]
+
+    def handle_event(self, event):
+        self.seen.append(event.name)
+        follow_up = self._follow_ups.get(event.name)
+        if follow_up is not None:
+            follow_up()
+
+
+@pytest.fixture(params=[False, True], ids=["plain", "profiled"])
+def queue(request):                                                 # every guarantee must hold the same with profiling enabled
+    queue = EventQueue()
+    if request.param:
+        queue.enable_profiling(EventProfiler(report_callback=lambda report: None))
+    return queue
+
+
+def make_handler(queue, follow_ups=None):
+    handler = RecordingHandler(follow_ups)
+    queue.register_handler(handler)
+    return handler
+
+
+def test_head_runs_before_and_tail_after_what_is_queued(queue):
+    handler = make_handler(queue)
+
+    queue.queue_event_at_tail(MarkerEvent("b"))
+    queue.queue_event_at_tail(MarkerEvent("c"))
+    queue.queue_event_at_head(MarkerEvent("a"))
+    queue.queue_event_at_tail(MarkerEvent("d"))
+    queue.broadcast_queued()
+
+    assert handler.seen == ["a", "b", "c", "d"]
+
+
+def test_next_tick_events_wait_for_the_next_drain_in_order(queue):
+    handler = make_handler(queue)
+
+    queue.queue_event_on_next_tick(MarkerEvent("later 1"))
+    queue.queue_event_on_next_tick(MarkerEvent("later 2"))
+    queue.queue_event_at_tail(MarkerEvent("now"))
+    queue.broadcast_queued()
+
+    assert handler.seen == ["now"]
+
+    queue.broadcast_queued()
+
+    assert handler.seen == ["now", "later 1", "later 2"]
+
+
+def test_events_queued_while_draining_run_after_those_already_queued(queue):
+    handler = make_handler(queue, {
+        "a": lambda: queue.queue_event_at_tail(MarkerEvent("from a")),
+        "b": lambda: queue.queue_event_on_next_tick(MarkerEvent("next from b")),
+    })
+
+    queue.queue_event_at_tail(MarkerEvent("a"))
+    queue.queue_event_at_tail(MarkerEvent("b"))
+    queue.queue_event_at_tail(MarkerEvent("c"))
+    queue.broadcast_queued()
+
+    assert handler.seen == ["a", "b", "c", "from a"]
+
+    queue.broadcast_queued()
+
+    assert handler.seen == ["a", "b", "c", "from a", "next from b"]
+
+
+def test_head_event_queued_while_draining_runs_next(queue):
+    handler = make_handler(queue, {
+        "a": lambda: queue.queue_event_at_head(MarkerEvent("urgent")),
+    })
+
+    queue.queue_event_at_tail(MarkerEvent("a"))
+    queue.queue_event_at_tail(MarkerEvent("b"))
+    queue.broadcast_queued()
+
+    assert handler.seen == ["a", "urgent", "b"]
+
+
+def test_drain_swaps_the_two_buffers_instead_of_allocating(queue):
+    make_handler(queue)
+    current, next_tick = queue._events, queue._next_tick_events
+
+    for tick in range(4):
+        queue.queue_event_at_tail(MarkerEvent(f"tick {tick}"))
+        queue.queue_event_on_next_tick(MarkerEvent(f"after tick {tick}"))
+        queue.broadcast_queued()
+
+        assert {id(queue._events), id(queue._next_tick_events)} == {id(current), id(next_tick)}
+        assert not queue._next_tick_events
+
+
+def test_profiling_sees_every_event_and_closes_a_tick_per_drain():
+    queue = EventQueue()
+    profiler = queue.enable_profiling(EventProfiler(report_callback=lambda report: None))
+    handler = make_handler(queue)
+
+    queue.queue_event_at_tail(MarkerEvent("a"))
+    queue.queue_event_on_next_tick(MarkerEvent("b"))
+    queue.broadcast_queued()
+    queue.broadcast_queued()
+
+    assert handler.seen == ["a", "b"]
+    assert profiler.ticks == 2
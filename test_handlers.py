@@ -0,0 +1,42 @@
+import os
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+
+from entities import AlwaysMovingTank, Bomb, Tank
+from game import GameInitializer
+
+
+def make_game():                                                    # two tanks on an empty map, no walls or trees to get in the way
+    return GameInitializer().initialize_game(
+        headless=True, seed=1, wall_chance=0, tree_min=0, tree_max=0,
+        loadout=[AlwaysMovingTank, AlwaysMovingTank], verbose=False)
+
+
+def drop_bomb(game, tank, owner, fuse_ticks):
+    bomb = Bomb(game.event_queue, tank.rect.center, owner)
+    bomb._fuse_ticks = fuse_ticks
+    game.entity_manager.register_entity(bomb)
+    return bomb
+
+
+def test_tank_driving_over_a_detonating_bomb_takes_the_blast_once():
+    game = make_game()
+    tank, other = game.entity_manager.get_entities_of_type(Tank)
+    hp = tank.hp
+    bomb = drop_bomb(game, tank, other, fuse_ticks=1)
+
+    game.run_headless(5)
+
+    assert tank.is_moving_simultaneously
+    assert tank.hp == hp - 3
+    assert bomb not in game.entity_manager.get_entities_of_type(Bomb)
+
+
+def test_tank_touching_an_unexploded_bomb_is_not_hurt():
+    game = make_game()
+    tank, other = game.entity_manager.get_entities_of_type(Tank)
+    hp = tank.hp
+    drop_bomb(game, tank, other, fuse_ticks=1000)
+
+    game.run_headless(5)
+
+    assert tank.hp == hp
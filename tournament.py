@@ -0,0 +1,307 @@
+import os
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")                   # matches are headless; no worker ever opens a window
+os.environ.setdefault("SDL_NO_SIGNAL_HANDLERS", "1")                # SDL would otherwise swallow the SIGTERM a pool stops its workers with
+
+import argparse
+import itertools
+import json
+import multiprocessing
+import random
+import statistics
+import time
+from collections import Counter
+from dataclasses import asdict, dataclass
+from typing import Optional, Tuple
+
+from constants import Control, TICK_RATE
+from controls import ControlState
+from entities import Tank
+from game import GameInitializer, TankGenerator
+
+TANK_TYPES = {tank_type.__name__: tank_type for tank_type in TankGenerator.TANK_TYPES}
+DEFAULT_MAX_TICKS = 90 * TICK_RATE                                  # a match still undecided after 90 seconds of game time is a draw
+DEFAULT_MATCHES = 10
+MOVE_CONTROLS = list(ControlState.MOVE_DIRECTIONS)
+
+
+class Bot:                                                          # drives one tank's ControlState the way a player holding keys would
+
+    def __init__(self, tank, rng):
+        self._tank = tank
+        self._rng = rng
+        if tank.control_state is None:
+            tank.control_state = ControlState()
+        self._controls = tank.control_state
+
+    @property
+    def tank(self):
+        return self._tank
+
+    def update(self, enemies):
+        pass
+
+    def _hold(self, control, held):                                 # only transitions reach the tank, like real key presses
+        if held and not self._controls.is_held(control):
+            self._controls.press(control)
+        elif not held and self._controls.is_held(control):
+            self._controls.release(control)
+
+    def _steer(self, move_control):                                 # holds at most one move control; None stops
+        for control in MOVE_CONTROLS:
+            if control != move_control:
+                self._hold(control, False)
+        if move_control is not None:
+            self._hold(move_control, True)
+
+
+class ScriptedBot(Bot):                                             # wanders in random straight runs, firing all the time and bombing now and then
+    TURN_TICKS = (20, 90)
+    BOMB_CHANCE = 0.01
+
+    def __init__(self, tank, rng):
+        super().__init__(tank, rng)
+        self._ticks_to_turn = 0
+
+    def update(self, enemies):
+        self._ticks_to_turn -= 1
+        if self._ticks_to_turn <= 0:
+            self._ticks_to_turn = self._rng.randint(*self.TURN_TICKS)
+            self._steer(self._rng.choice(MOVE_CONTROLS + [None]))
+
+        self._hold(Control.FIRE_BULLET, True)
+        self._hold(Control.DROP_BOMB, self._rng.random() < self.BOMB_CHANCE)
+
+
+class HunterBot(Bot):                                               # lines up with the nearest enemy, then drives at it firing; bombs it up close
+    BOMB_RANGE = 150
+    STUCK_TICKS = 10
+    DETOUR_TICKS = (15, 45)
+
+    def __init__(self, tank, rng):
+        super().__init__(tank, rng)
+        self._last_position = tank.rect.topleft
+        self._stuck_ticks = 0
+        self._detour_ticks = 0
+
+    def update(self, enemies):
+        if not enemies:
+            self._steer(None)
+            return
+
+        x, y = self._tank.rect.center
+        target = min(enemies, key=lambda enemy: abs(enemy.rect.centerx - x) + abs(enemy.rect.centery - y))
+        dx, dy = target.rect.centerx - x, target.rect.centery - y
+
+        if self._tank.rect.topleft == self._last_position:
+            self._stuck_ticks += 1
+        else:
+            self._stuck_ticks = 0
+        self._last_position = self._tank.rect.topleft
+
+        if self._detour_ticks > 0:                                  # blocked by a wall: try another way for a while
+            self._detour_ticks -= 1
+        elif self._stuck_ticks >= self.STUCK_TICKS:
+            self._stuck_ticks = 0
+            self._detour_ticks = self._rng.randint(*self.DETOUR_TICKS)
+            self._steer(self._rng.choice(MOVE_CONTROLS))
+        else:
+            self._steer(self._approach(dx, dy))
+
+        aligned = abs(dx) < Tank.WIDTH // 2 or abs(dy) < Tank.HEIGHT // 2
+        self._hold(Control.FIRE_BULLET, aligned or self._stuck_ticks > 0)          # shooting also clears walls in the way
+        self._hold(Control.DROP_BOMB, abs(dx) + abs(dy) < self.BOMB_RANGE)
+
+    @staticmethod
+    def _approach(dx, dy):                                          # close the smaller gap first, so the tank ends up in the target's line of fire
+        if abs(dx) < Tank.WIDTH // 2:
+            return Control.MOVE_DOWN if dy > 0 else Control.MOVE_UP
+        if abs(dy) < Tank.HEIGHT // 2:
+            return Control.MOVE_RIGHT if dx > 0 else Control.MOVE_LEFT
+        if abs(dx) < abs(dy):
+            return Control.MOVE_RIGHT if dx > 0 else Control.MOVE_LEFT
+        return Control.MOVE_DOWN if dy > 0 else Control.MOVE_UP
+
+
+BOTS = {
+    "scripted": ScriptedBot,
+    "hunter": HunterBot,
+}
+
+
+class BotControls:                                                  # stands in for the keyboard: the game polls it once per tick, and its bots act then
+
+    def __init__(self, bot_type, seed):
+        self.quit_requested = False
+        self._bot_type = bot_type
+        self._seed = seed
+        self._entity_manager = None
+        self._bots = []
+
+    def attach(self, entity_manager):                               # one bot per tank, each with its own seeded stream so matches replay exactly
+        self._entity_manager = entity_manager
+        self._bots = [
+            self._bot_type(tank, random.Random(f"{self._seed}:bot:{tank.player_id}"))
+            for tank in entity_manager.get_entities_of_type(Tank)
+        ]
+
+    def poll_events(self):
+        tanks = self.surviving_tanks()
+        for bot in self._bots:
+            if bot.tank in tanks:
+                bot.update([tank for tank in tanks if tank is not bot.tank])
+
+        return []
+
+    def surviving_tanks(self):
+        return self._entity_manager.get_entities_of_type(Tank)
+
+    def match_over(self):
+        return len(self.surviving_tanks()) < 2
+
+
+@dataclass(frozen=True)
+class MatchSpec:
+    seed: int
+    loadout: Tuple[str, ...]                                        # tank type names, player 1 first
+    bot: str = "hunter"
+    max_ticks: int = DEFAULT_MAX_TICKS
+
+
+@dataclass(frozen=True)
+class MatchResult:
+    seed: int
+    loadout: Tuple[str, ...]
+    bot: str
+    winner: Optional[int]                                           # player id, or None for a draw
+    ticks: int
+    seconds: float                                                  # wall-clock time the simulation took
+
+    @property
+    def winner_type(self):
+        return None if self.winner is None else self.loadout[self.winner - 1]
+
+
+def play_match(spec):                                               # runs in a worker process, so it takes and returns plain picklable data
+    controls = BotControls(BOTS[spec.bot], spec.seed)
+    game = GameInitializer().initialize_game(
+        headless=True, seed=spec.seed, input_source=controls,
+        loadout=[TANK_TYPES[name] for name in spec.loadout], verbose=False)
+    controls.attach(game.entity_manager)
+
+    stats = game.run_headless(spec.max_ticks, until=controls.match_over)
+
+    survivors = controls.surviving_tanks()
+    winner = survivors[0].player_id if len(survivors) == 1 else None
+    return MatchResult(spec.seed, spec.loadout, spec.bot, winner, stats.ticks, stats.seconds)
+
+
+def make_schedule(loadouts, matches_per_pairing, seed=0, bot="hunter", max_ticks=DEFAULT_MAX_TICKS):
+    specs = []
+
+    for first, second in itertools.permutations(loadouts, 2):      # every pairing from both sides, each on the same set of maps
+        for index in range(matches_per_pairing):
+            specs.append(MatchSpec(seed + index, (first, second), bot, max_ticks))
+
+    return specs
+
+
+def run_tournament(specs, processes=None, chunksize=1):             # yields results in the order matches finish
+    if processes == 1:
+        for spec in specs:
+            yield play_match(spec)
+        return
+
+    pool = multiprocessing.Pool(processes)
+    try:
+        yield from pool.imap_unordered(play_match, specs, chunksize)
+        pool.close()                                                # workers finish and exit on their own
+    finally:
+        pool.terminate()                                            # no-op after close(); stops the workers if the caller gave up early
+        pool.join()
+
+
+class TournamentStats:
+
+    def __init__(self):
+        self._matches = Counter()
+        self._wins = Counter()
+        self._losses = Counter()
+        self._draws = Counter()
+        self._ticks = []
+
+    def add(self, result):
+        self._ticks.append(result.ticks)
+
+        for player_id, tank_type in enumerate(result.loadout, start=1):
+            self._matches[tank_type] += 1
+            if result.winner is None:
+                self._draws[tank_type] += 1
+            elif result.winner == player_id:
+                self._wins[tank_type] += 1
+            else:
+                self._losses[tank_type] += 1
+
+    def win_rates(self):
+        return {tank_type: self._wins[tank_type] / matches for tank_type, matches in self._matches.items()}
+
+    def durations(self):
+        if not self._ticks:
+            return {}
+
+        ticks = sorted(self._ticks)
+        return {
+            "matches": len(ticks),
+            "mean": statistics.fmean(ticks),
+            "median": statistics.median(ticks),
+            "p90": ticks[min(len(ticks) - 1, len(ticks) * 90 // 100)],
+            "max": ticks[-1],
+        }
+
+    def format_table(self):
+        lines = [f"{'Tank type':<18} {'matches':>8} {'wins':>6} {'losses':>7} {'draws':>6} {'win rate':>9}"]
+
+        for tank_type, win_rate in sorted(self.win_rates().items(), key=lambda item: -item[1]):
+            lines.append(
+                f"{tank_type:<18} {self._matches[tank_type]:>8} {self._wins[tank_type]:>6} {self._losses[tank_type]:>7}"
+                f" {self._draws[tank_type]:>6} {win_rate:>9.1%}")
+
+        durations = self.durations()
+        if durations:
+            lines.append(
+                f"Match length: mean {durations['mean'] / TICK_RATE:.1f}s, median {durations['median'] / TICK_RATE:.1f}s,"
+                f" p90 {durations['p90'] / TICK_RATE:.1f}s, longest {durations['max'] / TICK_RATE:.1f}s of game time")
+
+        return "\n".join(lines)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="play seeded headless matches between tank loadouts across worker processes")
+    parser.add_argument("--matches", type=int, default=DEFAULT_MATCHES, help="matches per pairing, played from each side")
+    parser.add_argument("--loadouts", nargs="+", choices=sorted(TANK_TYPES), default=list(TANK_TYPES), help="tank types to pair up")
+    parser.add_argument("--bot", choices=sorted(BOTS), default="hunter", help="controller for every tank")
+    parser.add_argument("--max-ticks", type=int, default=DEFAULT_MAX_TICKS, help="ticks before a match is called a draw")
+    parser.add_argument("--seed", type=int, default=0, help="seed of the first map; pairing N plays maps seed..seed+matches-1")
+    parser.add_argument("--processes", type=int, default=None, help="worker processes (default: one per core; 1 runs in this process)")
+    parser.add_argument("--output", metavar="PATH", help="append one JSON line per match to PATH as results come in")
+    args = parser.parse_args()
+
+    specs = make_schedule(args.loadouts, args.matches, args.seed, args.bot, args.max_ticks)
+    stats = TournamentStats()
+    output = open(args.output, "a") if args.output else None
+    start = time.perf_counter()
+
+    try:
+        for finished, result in enumerate(run_tournament(specs, args.processes), start=1):
+            stats.add(result)
+            if output is not None:
+                output.write(json.dumps(asdict(result)) + "\n")
+                output.flush()
+            print(f"[{finished}/{len(specs)}] seed {result.seed} {' vs '.join(result.loadout)}: "
+                  f"{result.winner_type or 'draw'} after {result.ticks} ticks")
+    finally:
+        if output is not None:
+            output.close()
+
+    seconds = time.perf_counter() - start
+    print(stats.format_table())
+    print(f"{len(specs)} matches in {seconds:.1f}s ({len(specs) / seconds:.1f} matches/s, {args.processes or os.cpu_count()} processes)")
@@ -1,9 +1,29 @@
 import random
-import math
+from collections import OrderedDict
+
+import numpy as np
 from pygame import Rect, Color
 
 
-def get_random_coords(width, height, body_width=0, body_height=0, invalid_areas=None):
+class RandomStreams:                                                                    # one independent, seedable generator per subsystem so matches can be reproduced
+    SUBSYSTEMS = ("terrain", "tanks", "bombs", "colors")
+
+    def __init__(self, seed=None):
+        self.reseed(seed)
+
+    def reseed(self, seed):
+        self.seed = seed
+        for name in self.SUBSYSTEMS:
+            setattr(self, name, random.Random(f"{seed}:{name}"))                        # str seeds are hashed with SHA-512, so streams do not depend on PYTHONHASHSEED
+
+    def getstate(self):                                                                 # every stream's position, so a digest also catches a stream drawn from more or fewer times
+        return tuple(getattr(self, name).getstate() for name in self.SUBSYSTEMS)
+
+
+RANDOM_STREAMS = RandomStreams()
+
+
+def get_random_coords(width, height, body_width=0, body_height=0, invalid_areas=None, rng=random):
     if not invalid_areas:
         unified_invalid_areas = None
     else:
@@ -15,8 +35,8 @@ def get_random_coords(width, height, body_width=0, body_height=0, invalid_areas=
 
     while True:
         coords = (
-            random.randrange(0, width - body_width),
-            random.randrange(0, height - body_height),
+            rng.randrange(0, width - body_width),
+            rng.randrange(0, height - body_height),
         )
 
         if (not unified_invalid_areas) or (not unified_invalid_areas.collidepoint(coords)):
@@ -28,34 +48,72 @@ def get_random_coords(width, height, body_width=0, body_height=0, invalid_areas=
 def get_entity_rects(entities):
     return [entity.rect for entity in entities]
 
-def get_random_color():                                                                 # helper function for RandomColorTank
-    return Color(random.randint(0,255), random.randint(0,255), random.randint(0,255))
+class TextRenderCache:                                                                  # bounded LRU cache of rendered text surfaces; callers must blit the returned surface, never draw on it
+    MAX_SIZE = 256
+
+    def __init__(self, max_size=MAX_SIZE):
+        self._max_size = max_size
+        self._surfaces = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self._surfaces)
+
+    @property
+    def hit_rate(self):
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def render(self, font, text, color, antialias=True):
+        if isinstance(color, Color):                                                    # pygame.Color is mutable and unhashable
+            color = tuple(color)
+
+        key = (font, text, color, antialias)
+        surface = self._surfaces.get(key)
+
+        if surface is not None:
+            self.hits += 1
+            self._surfaces.move_to_end(key)
+            return surface
+
+        self.misses += 1
+        surface = font.render(text, antialias, color)
+        self._surfaces[key] = surface
+
+        if len(self._surfaces) > self._max_size:
+            self._surfaces.popitem(last=False)
+
+        return surface
+
+    def clear(self):
+        self._surfaces.clear()
+        self.hits = 0
+        self.misses = 0
+
+
+TEXT_CACHE = TextRenderCache()
+
+
+def render_text(font, text, color, antialias=True):
+    return TEXT_CACHE.render(font, text, color, antialias)
 
-def collision(rect, center, radius):                                                    # improvised circle-rectangle collision function (full explanation is included in the image file)
-    max_distance_from_circle_center = math.sqrt((radius**2) + (rect.width**2))
-    left = rect.left
-    right = rect.left + rect.width
-    top = rect.top
-    bottom = rect.top + rect.height
 
-    centerx = center[0]
-    centery = center[1]
+def get_random_color(rng=random):                                                       # helper function for RandomColorTank
+    return Color(rng.randint(0,255), rng.randint(0,255), rng.randint(0,255))
 
-    topleft = [left, top]
-    bottomleft = [left, bottom]
-    bottomright = [right, bottom]
-    topright = [right, top]
+def collision(rect, center, radius):                                                    # exact circle-rectangle collision: the point of the rect closest to the circle's center must lie inside the circle
+    nearest_x = min(max(center[0], rect.left), rect.right)
+    nearest_y = min(max(center[1], rect.top), rect.bottom)
+    return (center[0] - nearest_x) ** 2 + (center[1] - nearest_y) ** 2 < radius ** 2
 
-    relevant_coords = [(topleft, bottomleft), (bottomleft, bottomright), (bottomright, topright), (topright, topleft)]
 
-    q = [centerx, centery]
+def circle_rect_collisions(center, radius, rects):                                      # batched version of collision over an (n, 4) array of (left, top, width, height) rects
+    rects = np.asarray(rects, dtype=np.int64).reshape(-1, 4)
+    lefts = rects[:, 0]
+    tops = rects[:, 1]
 
-    for coord in relevant_coords:
-        distance_from_circle_center1 = math.dist(coord[0], q)
-        distance_from_circle_center2 = math.dist(coord[1], q)
-        if distance_from_circle_center1 <= max_distance_from_circle_center and distance_from_circle_center2 <= max_distance_from_circle_center:         # hard case
-            return True
-        if distance_from_circle_center1 <= radius:                                                            # easy case
-            return True
+    nearest_x = np.clip(center[0], lefts, lefts + rects[:, 2])
+    nearest_y = np.clip(center[1], tops, tops + rects[:, 3])
 
-    return False
+    return (center[0] - nearest_x) ** 2 + (center[1] - nearest_y) ** 2 < radius ** 2